@@ -0,0 +1,100 @@
+"""Compare parse time and peak memory of embedding response formats.
+
+Runs offline: synthetic `/v1/embeddings` response bodies are built locally in
+both wire formats and decoded the way each client path would:
+
+- `float json`: `encoding_format="float"`, JSON lists parsed into Python floats.
+- `sdk default`: base64 on the wire, but expanded into Python float lists like
+  the OpenAI SDK does when `encoding_format` is not given.
+- `base64 -> float32` / `base64 -> float16`: `decode_base64_embeddings()`.
+
+Usage:
+    uv run benchmark_embeddings.py [num_vectors] [dim]
+"""
+
+import base64
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from embeddings_api import decode_base64_embeddings
+
+REPEATS = 3
+
+
+def build_bodies(num_vectors: int, dim: int) -> tuple[bytes, bytes]:
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((num_vectors, dim)).astype("<f4")
+    float_body = json.dumps(
+        {"data": [{"index": i, "embedding": v.tolist()} for i, v in enumerate(vectors)]}
+    ).encode("utf-8")
+    base64_body = json.dumps(
+        {
+            "data": [
+                {"index": i, "embedding": base64.b64encode(v.tobytes()).decode("ascii")}
+                for i, v in enumerate(vectors)
+            ]
+        }
+    ).encode("utf-8")
+    return float_body, base64_body
+
+
+def parse_float_json(body: bytes) -> np.ndarray:
+    data = json.loads(body)["data"]
+    return np.asarray([item["embedding"] for item in data], dtype=np.float32)
+
+
+def parse_sdk_default(body: bytes) -> np.ndarray:
+    data = json.loads(body)["data"]
+    embeddings = [
+        np.frombuffer(base64.b64decode(item["embedding"]), dtype="<f4").tolist()
+        for item in data
+    ]
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def parse_base64(body: bytes, dtype) -> np.ndarray:
+    return decode_base64_embeddings(json.loads(body)["data"], dtype)
+
+
+def measure(parse, body: bytes) -> tuple[float, int]:
+    """Return the best wall time in seconds and the peak traced bytes."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        parse(body)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    parse(body)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    num_vectors = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    dim = int(sys.argv[2]) if len(sys.argv) > 2 else 1024
+    float_body, base64_body = build_bodies(num_vectors, dim)
+
+    cases = [
+        ("float json", parse_float_json, float_body),
+        ("sdk default", parse_sdk_default, base64_body),
+        ("base64 -> float32", lambda b: parse_base64(b, np.float32), base64_body),
+        ("base64 -> float16", lambda b: parse_base64(b, np.float16), base64_body),
+    ]
+    print(f"{num_vectors} vectors x {dim} dims")
+    print(f"{'path':<20}{'payload MB':>12}{'parse ms':>12}{'peak MB':>12}")
+    for name, parse, body in cases:
+        seconds, peak = measure(parse, body)
+        print(
+            f"{name:<20}{len(body) / 1e6:>12.1f}"
+            f"{seconds * 1e3:>12.1f}{peak / 1e6:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Compare encode time and payload size of the image encoding modes.
+
+Runs offline on a PDF page rendered at the model's input size (the pages
+`dots_ocr.py` sends) and on an image file from `example_data`:
+
+- `png (level N)`: lossless PNG at zlib compression level N (6 is Pillow's
+  default and what `pil_image_to_base64()` used to do unconditionally).
+- `jpeg qN` / `webp qN`: lossy encoders at quality N.
+- `pass-through`: `image_file_to_base64()` on the original file, which
+  base64s the file bytes without decoding them (image files only).
+
+Usage:
+    uv run benchmark_image_encoding.py [pdf_file] [image_file]
+"""
+
+import sys
+import time
+
+import fitz  # type: ignore
+from PIL import Image
+
+from utils.dots_ocr_utils import (
+    fitz_doc_to_image,
+    image_file_to_base64,
+    pil_image_to_base64,
+)
+
+REPEATS = 3
+
+MODES = [
+    ("png (level 6)", {"format": "PNG"}),
+    ("png (level 1)", {"format": "PNG", "compress_level": 1}),
+    ("jpeg q90", {"format": "JPEG", "quality": 90}),
+    ("jpeg q75", {"format": "JPEG", "quality": 75}),
+    ("webp q80", {"format": "WEBP", "quality": 80}),
+]
+
+
+def measure(encode) -> tuple[float, int]:
+    """Return the best wall time in seconds and the data URL length."""
+    best, size = float("inf"), 0
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        size = len(encode())
+        best = min(best, time.perf_counter() - start)
+    return best, size
+
+
+def report(title: str, cases) -> None:
+    print(title)
+    print(f"{'mode':<16}{'encode ms':>12}{'payload KB':>12}")
+    for name, encode in cases:
+        seconds, size = measure(encode)
+        print(f"{name:<16}{seconds * 1e3:>12.1f}{size / 1e3:>12.1f}")
+    print()
+
+
+def main():
+    pdf_file = sys.argv[1] if len(sys.argv) > 1 else "example_data/example_pdf.pdf"
+    image_file = sys.argv[2] if len(sys.argv) > 2 else "example_data/example_image.jpg"
+
+    with fitz.open(pdf_file) as doc:
+        page = fitz_doc_to_image(doc[0], fit_model=True)
+    report(
+        f"{pdf_file} page 1 ({page.width}x{page.height})",
+        [
+            (name, lambda kwargs=kwargs: pil_image_to_base64(page, **kwargs))
+            for name, kwargs in MODES
+        ],
+    )
+
+    with Image.open(image_file) as image:
+        image.load()
+    report(
+        f"{image_file} ({image.width}x{image.height})",
+        [("pass-through", lambda: image_file_to_base64(image_file))]
+        + [
+            (name, lambda kwargs=kwargs: pil_image_to_base64(image, **kwargs))
+            for name, kwargs in MODES
+        ],
+    )
+
+
+if __name__ == "__main__":
+    main()
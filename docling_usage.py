@@ -1,43 +1,51 @@
 import os
+
 import httpx
 import truststore
 
+from utils.clients import auth_headers, get_http_client
+
 truststore.inject_into_ssl()
 
 # Configuration
 API_URL = os.environ.get("api_url", "http://localhost:8000/v1")
 API_KEY = os.environ.get("API_KEY", "none")
-os.environ['no_proxy'] = os.environ.get("API_URL", "").replace("https://", "").split("/")[0]
+os.environ["no_proxy"] = (
+    os.environ.get("API_URL", "").replace("https://", "").split("/")[0]
+)
 SOURCE_URL = "https://arxiv.org/pdf/2501.17887"
 SOURCE_IMG = "example_data/example_image.jpg"
 
+
 def convert_document(options: dict, description: str):
     """Sends a conversion request to Docling Serve with specific plugin options."""
-    payload = {
-        "options": options,
-        "sources": [{"kind": "http", "url": SOURCE_URL}]
-    }
+    payload = {"options": options, "sources": [{"kind": "http", "url": SOURCE_URL}]}
 
     print(f"--- Testing: {description} ---")
-    
-    with httpx.Client(timeout=60.0) as client:
-        client.headers.update({"Authorization": f"Bearer {API_KEY}"})
-        try:
-            response = client.post(f"{API_URL}/convert/source", json=payload)
-            response.raise_for_status()
-            
-            # The API returns the converted document structure
-            result = response.json()
-            print(result)
-            print("Status: Success")
-            # Return a snippet of the result for verification
-            return result
-        except httpx.HTTPStatusError as e:
-            print(f"Error: {e.response.status_code} - {e.response.text}")
-        except Exception as e:
-            print(f"Connection Error: {e}")
-
-def convert_file(file_path: str, description: str, custom_options: dict = None):
+
+    client = get_http_client(API_URL)
+    try:
+        response = client.post(
+            f"{API_URL}/convert/source",
+            json=payload,
+            headers=auth_headers(API_KEY),
+            timeout=60.0,
+        )
+        response.raise_for_status()
+
+        # The API returns the converted document structure
+        result = response.json()
+        print(result)
+        print("Status: Success")
+        # Return a snippet of the result for verification
+        return result
+    except httpx.HTTPStatusError as e:
+        print(f"Error: {e.response.status_code} - {e.response.text}")
+    except Exception as e:
+        print(f"Connection Error: {e}")
+
+
+def convert_file(file_path: str, description: str, custom_options: dict | None = None):
     """Sends a conversion request to Docling Serve with specific plugin options."""
     data_payload = {
         "target_type": "inbody",
@@ -48,7 +56,7 @@ def convert_file(file_path: str, description: str, custom_options: dict = None):
         "pipeline": "standard",
         "do_table_structure": "true",
         "include_images": "true",
-        "layout_custom_config.kind": "ppdoclayout-v3", # Using your custom layout plugin
+        "layout_custom_config.kind": "ppdoclayout-v3",  # Using your custom layout plugin
         "vlm_pipeline_preset": "default",
     }
     endpoint = f"{API_URL}/convert/file"
@@ -58,53 +66,52 @@ def convert_file(file_path: str, description: str, custom_options: dict = None):
         data_payload.update(custom_options)
 
     print(f"--- Testing: {description} ---")
-    
-    with httpx.Client(timeout=60.0) as client:
-        client.headers.update({"Authorization": f"Bearer {API_KEY}"})
-        try:
-            with open(file_path, "rb") as f:
-                files = {"files": (os.path.basename(file_path), f)}
-                
-                response = client.post(
-                    endpoint, 
-                    data=data_payload, 
-                    files=files
-                )
-                
-            response.raise_for_status()
-            print("Status: Success")
-            print(response.json())
-            return response.json()
-        except httpx.HTTPStatusError as e:
-            print(f"Error: {e.response.status_code} - {e.response.text}")
-        except Exception as e:
-            print(f"Connection Error: {e}")
+
+    client = get_http_client(endpoint)
+    try:
+        with open(file_path, "rb") as f:
+            files = {"files": (os.path.basename(file_path), f)}
+
+            response = client.post(
+                endpoint,
+                data=data_payload,
+                files=files,
+                headers=auth_headers(API_KEY),
+                timeout=60.0,
+            )
+
+        response.raise_for_status()
+        print("Status: Success")
+        print(response.json())
+        return response.json()
+    except httpx.HTTPStatusError as e:
+        print(f"Error: {e.response.status_code} - {e.response.text}")
+    except Exception as e:
+        print(f"Connection Error: {e}")
+
 
 if __name__ == "__main__":
-    
     # 1. Using only GLM-OCR as the OCR engine
-    glm_only_options = {
-        "ocr_engine": "glm-ocr-remote"
-    }
+    glm_only_options = {"ocr_engine": "glm-ocr-remote"}
     convert_document(glm_only_options, "GLM-OCR Engine Only")
 
     # 2. Using only PP-DocLayout as the layout engine
-    pp_layout_options = {
-        "layout_custom_config": {"kind": "ppdoclayout-v3"}
-    }
+    pp_layout_options = {"layout_custom_config": {"kind": "ppdoclayout-v3"}}
     convert_document(pp_layout_options, "PP-DocLayout Engine Only")
 
     # 3. Combined: Both GLM-OCR and PP-DocLayout
     combined_options = {
         "ocr_engine": "glm-ocr-remote",
-        "layout_custom_config": {"kind": "ppdoclayout-v3"}
+        "layout_custom_config": {"kind": "ppdoclayout-v3"},
     }
     convert_document(combined_options, "Combined GLM-OCR + PP-DocLayout")
 
     # 4. Testing file upload with both plugins
     convert_file(SOURCE_IMG, "Combined GLM-OCR + PP-DocLayout with File Upload")
 
-    complex_overrides = {
-        "to_formats": ["json", "doctags"]
-    }
-    convert_file(SOURCE_IMG, "Complex Overrides with File Upload", custom_options=complex_overrides)
\ No newline at end of file
+    complex_overrides = {"to_formats": ["json", "doctags"]}
+    convert_file(
+        SOURCE_IMG,
+        "Complex Overrides with File Upload",
+        custom_options=complex_overrides,
+    )
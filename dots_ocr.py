@@ -1,34 +1,129 @@
+import json
 import os
+import re
+import threading
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from difflib import SequenceMatcher
 
-from openai import OpenAI
 from PIL import Image
 
-from utils.dots_ocr_utils import load_images_from_pdf, pil_image_to_base64
+from utils.clients import get_openai_client
+from utils.dots_ocr_utils import (
+    MAX_PIXELS,
+    TILE_OVERLAP,
+    TILE_SIZE,
+    crop_image_tiles,
+    decode_image_bytes,
+    image_bytes_to_base64,
+    iter_images_from_pdf,
+    iter_pdf_page_tiles,
+    pil_image_to_base64,
+    prefilter_pdf_pages,
+    render_pdf_pages_parallel,
+    smart_resize,
+    sniff_image_format,
+    split_oversized_pages,
+    split_pages_by_text_layer,
+)
 from utils.get_model import get_model_id
+from utils.layout_stream import LayoutStreamParser
+from utils.ocr_cache import OcrCache, image_digest, ocr_cache_from_env, ocr_cache_key
 from utils.ocr_prompts import dict_promptmode_to_prompt
 
+# Pages sent to the server at once. vLLM batches concurrent requests, so this
+# should roughly match the number of sequences the server runs in parallel.
+DEFAULT_MAX_IN_FLIGHT = 8
+
+# Optional persistent result cache, enabled by setting OCR_CACHE_PATH.
+ocr_cache = ocr_cache_from_env()
+
+# Layout regions that carry no text worth extracting in two-stage OCR.
+LAYOUT_SKIP_CATEGORIES = frozenset({"Picture", "Page-header", "Page-footer"})
+# Pixels of context kept around each region crop.
+REGION_PADDING = 8
+# Tile overlap merging. Lines of 9pt print with 1.2 line spacing are
+# MIN_LINE_HEIGHT_PT apart, so an overlap band touches at most
+# `overlap_lines()` lines at a given DPI, and only lines that can lie in it
+# are compared: the first lines of a tile with the last lines of the tiles
+# above, and each line with the lines at the same relative height in the
+# tile to the left. A line is dropped if it matches one of those exactly
+# or, with at least MIN_MERGE_CHARS characters, is MERGE_SIMILARITY similar
+# (glyphs cut by the tile edge are read slightly differently).
+MIN_LINE_HEIGHT_PT = 10.8
+MIN_MERGE_CHARS = 8
+MERGE_SIMILARITY = 0.9
+# Tiles above a tile that can overlap it: above-left, above, above-right.
+_ABOVE_NEIGHBOURS = ((-1, -1), (-1, 0), (-1, 1))
+
+
+@dataclass
+class LayoutRegion:
+    bbox: tuple[int, int, int, int]  # x1, y1, x2, y2 in page image pixels
+    category: str
+    text: str | None = None
+
 
 def inference_with_vllm(
-    image: Image.Image,
+    image: Image.Image | bytes,
     prompt: str,
     host="localhost",
     port=8000,
     temperature=0.1,
     top_p=0.9,
     max_completion_tokens=32768,
+    image_format="PNG",
+    image_quality=90,
+    cache: OcrCache | None = None,
 ):
+    client, model_name = _client_and_model(host, port)
+    if cache is not None:
+        key = _cache_key(
+            image,
+            prompt,
+            model_name,
+            temperature=temperature,
+            top_p=top_p,
+            max_completion_tokens=max_completion_tokens,
+            image_format=image_format,
+            image_quality=image_quality,
+        )
+        if (cached := cache.get(key)) is not None:
+            return cached
+    response = client.chat.completions.create(
+        messages=_build_messages(image, prompt, image_format, image_quality),
+        model=model_name,
+        max_completion_tokens=max_completion_tokens,
+        temperature=temperature,
+        top_p=top_p,
+    )
+    text = response.choices[0].message.content
+    if cache is not None and text is not None:
+        cache.put(key, text)
+    return text
+
+
+def _client_and_model(host, port):
     api_url = f"https://{host}:{port}/v1"
     api_key = "{}".format(os.environ.get("API_KEY", "0"))
-    client = OpenAI(api_key=api_key, base_url=api_url)
-    model_name = get_model_id(api_key=api_key, api_url=api_url)
-    messages = []
-    messages.append(
+    client = get_openai_client(base_url=api_url, api_key=api_key)
+    return client, get_model_id(api_key=api_key, api_url=api_url)
+
+
+def _build_messages(image, prompt, image_format, image_quality) -> list[dict]:
+    if isinstance(image, bytes):
+        image_url = image_bytes_to_base64(image)
+    else:
+        image_url = pil_image_to_base64(image, image_format, image_quality)
+    return [
         {
             "role": "user",
             "content": [
                 {
                     "type": "image_url",
-                    "image_url": {"url": pil_image_to_base64(image)},
+                    "image_url": {"url": image_url},
                 },
                 {
                     "type": "text",
@@ -36,25 +131,580 @@ def inference_with_vllm(
                 },
             ],
         }
+    ]
+
+
+def _cache_key(image, prompt, model_name, image_format, image_quality, **sampling):
+    # Pre-encoded bytes and images encoded losslessly here are the same
+    # model input, so they share cache entries.
+    if isinstance(image, bytes):
+        encoding, quality = sniff_image_format(image), None
+    else:
+        encoding = image_format.lower().replace("jpg", "jpeg")
+        quality = None if encoding == "png" else image_quality
+    return ocr_cache_key(
+        image_digest(image),
+        prompt,
+        model_name,
+        image_encoding=encoding,
+        image_quality=quality,
+        **sampling,
     )
-    response = client.chat.completions.create(
-        messages=messages,
+
+
+def iter_layout_stream(
+    image: Image.Image | bytes,
+    prompt: str = dict_promptmode_to_prompt["prompt_layout_all_en"],
+    host="localhost",
+    port=8000,
+    temperature=0.1,
+    top_p=0.9,
+    max_completion_tokens=32768,
+    image_format="PNG",
+    image_quality=90,
+    cache: OcrCache | None = None,
+) -> Iterator[dict]:
+    """Stream a layout prompt and yield each layout element as it closes.
+
+    The response is requested with `stream=True` and fed through
+    `LayoutStreamParser`, so every `{"bbox", "category", "text"}` element is
+    available as soon as the model has generated it instead of after the
+    whole page. Bboxes are in the page's `smart_resize` coordinates. With a
+    `cache`, a cached page is replayed from the stored output and complete
+    outputs are stored.
+
+    Raises:
+        ValueError: If the output ends inside an element (e.g. truncated at
+            `max_completion_tokens`).
+    """
+    client, model_name = _client_and_model(host, port)
+    parser = LayoutStreamParser()
+    if cache is not None:
+        key = _cache_key(
+            image,
+            prompt,
+            model_name,
+            temperature=temperature,
+            top_p=top_p,
+            max_completion_tokens=max_completion_tokens,
+            image_format=image_format,
+            image_quality=image_quality,
+        )
+        if (cached := cache.get(key)) is not None:
+            yield from parser.feed(cached)
+            parser.close()
+            return
+
+    chunks = []
+    # Closing the stream (also when the consumer stops early) drops the
+    # connection, which makes the server abort the generation.
+    with client.chat.completions.create(
+        messages=_build_messages(image, prompt, image_format, image_quality),
         model=model_name,
         max_completion_tokens=max_completion_tokens,
         temperature=temperature,
         top_p=top_p,
+        stream=True,
+    ) as stream:
+        for chunk in stream:
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            chunks.append(chunk.choices[0].delta.content)
+            yield from parser.feed(chunks[-1])
+    parser.close()
+    if cache is not None:
+        cache.put(key, "".join(chunks))
+
+
+def iter_ocr_pages(
+    images: Iterable[Image.Image | bytes],
+    prompt: str,
+    max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+    ocr: Callable[..., str] | None = None,
+    **inference_kwargs,
+) -> Iterator[tuple[int, str]]:
+    """OCR pages concurrently and yield `(page_index, text)` as each finishes.
+
+    `images` is consumed lazily, so at most `max_in_flight` pages are held in
+    memory and in flight at a time. Results arrive in completion order.
+    `ocr(image, prompt, **inference_kwargs)` runs each page and defaults to
+    `inference_with_vllm`.
+    """
+    ocr = ocr or inference_with_vllm
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        pending = {}
+        for index, image in enumerate(images):
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield pending.pop(future), future.result()
+            future = executor.submit(ocr, image, prompt, **inference_kwargs)
+            pending[future] = index
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+
+def ocr_pages(
+    images: Iterable[Image.Image | bytes],
+    prompt: str,
+    max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+    ocr: Callable[..., str] | None = None,
+    **inference_kwargs,
+) -> list[str]:
+    """OCR pages concurrently and return the results in page order."""
+    results = dict(
+        iter_ocr_pages(images, prompt, max_in_flight, ocr, **inference_kwargs)
+    )
+    return [results[index] for index in range(len(results))]
+
+
+def parse_layout(text: str) -> list[dict]:
+    """Parse the JSON layout output of the layout prompts into a list of cells.
+
+    Tolerates a Markdown code fence around the JSON and a top-level object
+    wrapping the list.
+    """
+    text = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    layout = json.loads(text)
+    if isinstance(layout, dict):
+        layout = next((v for v in layout.values() if isinstance(v, list)), [layout])
+    return [cell for cell in layout if isinstance(cell, dict) and "bbox" in cell]
+
+
+def _scale_bbox(bbox, scale_x: float, scale_y: float) -> tuple[int, int, int, int]:
+    x1, y1, x2, y2 = bbox
+    return (
+        round(x1 * scale_x),
+        round(y1 * scale_y),
+        round(x2 * scale_x),
+        round(y2 * scale_y),
+    )
+
+
+def _grow_span(start: int, end: int, length: int, limit: int) -> tuple[int, int]:
+    """Grow `[start, end)` to `length` within `[0, limit)`, past `start` if needed."""
+    end = min(limit, max(end, start + length))
+    return max(0, min(start, end - length)), end
+
+
+def _ocr_region(
+    image: Image.Image, region: LayoutRegion, padding: int, **inference_kwargs
+) -> str:
+    """OCR one region from a padded crop with the grounding prompt."""
+    x1, y1, x2, y2 = region.bbox
+    left, top = max(0, x1 - padding), max(0, y1 - padding)
+    right = min(image.width, x2 + padding)
+    bottom = min(image.height, y2 + padding)
+    # smart_resize rejects aspect ratios above 200, e.g. thin rules.
+    if right - left > 199 * (bottom - top):
+        top, bottom = _grow_span(top, bottom, (right - left) // 199 + 1, image.height)
+    if bottom - top > 199 * (right - left):
+        left, right = _grow_span(left, right, (bottom - top) // 199 + 1, image.width)
+    crop = image.crop((left, top, right, bottom))
+
+    # Grounding bboxes are in the coordinates of the crop as the model sees it.
+    height, width = smart_resize(crop.height, crop.width)
+    bbox = _scale_bbox(
+        (x1 - left, y1 - top, x2 - left, y2 - top),
+        width / crop.width,
+        height / crop.height,
+    )
+    prompt = dict_promptmode_to_prompt["prompt_grounding_ocr"] + str(list(bbox))
+    return inference_with_vllm(crop, prompt, **inference_kwargs)
+
+
+def ocr_layout_regions(
+    image: Image.Image | bytes,
+    layout_prompt: str = dict_promptmode_to_prompt["prompt_layout_only_en"],
+    max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+    skip_categories=LAYOUT_SKIP_CATEGORIES,
+    padding=REGION_PADDING,
+    request_slots: threading.Semaphore | None = None,
+    **inference_kwargs,
+) -> list[LayoutRegion]:
+    """Two-stage OCR: detect the layout once, then OCR each region crop.
+
+    The layout bboxes refer to the page after `smart_resize` and are scaled
+    back to `image` pixels. Regions in `skip_categories` are returned with
+    `text=None`; all others are cropped and OCRed concurrently with
+    `prompt_grounding_ocr`. Each crop generates only its own text, so the
+    regions finish in parallel instead of decoding the whole page in one
+    long generation.
+
+    Every request holds one of `request_slots` while it runs. Pass the same
+    semaphore for all pages of a document to bound the requests of all
+    pages together; by default a page gets `max_in_flight` slots of its own.
+
+    Returns:
+        list[LayoutRegion]: Regions in the reading order of the layout.
+    """
+    if request_slots is None:
+        request_slots = threading.BoundedSemaphore(max_in_flight)
+    if isinstance(image, bytes):
+        image = decode_image_bytes(image).convert("RGB")
+    with request_slots:
+        output = inference_with_vllm(image, layout_prompt, **inference_kwargs)
+    layout = parse_layout(output)
+
+    height, width = smart_resize(image.height, image.width)
+    scale_x, scale_y = image.width / width, image.height / height
+    regions = []
+    for cell in layout:
+        x1, y1, x2, y2 = _scale_bbox(cell["bbox"], scale_x, scale_y)
+        x1, x2 = max(0, x1), min(image.width, x2)
+        y1, y2 = max(0, y1), min(image.height, y2)
+        if x2 > x1 and y2 > y1:
+            regions.append(LayoutRegion((x1, y1, x2, y2), cell.get("category", "Text")))
+
+    def ocr_region(region: LayoutRegion) -> str:
+        with request_slots:
+            return _ocr_region(image, region, padding, **inference_kwargs)
+
+    to_ocr = [r for r in regions if r.category not in skip_categories]
+    with ThreadPoolExecutor(max_workers=max_in_flight) as executor:
+        texts = executor.map(ocr_region, to_ocr)
+        for region, text in zip(to_ocr, texts):
+            region.text = text
+    return regions
+
+
+def ocr_page_two_stage(
+    image: Image.Image | bytes,
+    layout_prompt: str = dict_promptmode_to_prompt["prompt_layout_only_en"],
+    **kwargs,
+) -> str:
+    """Run `ocr_layout_regions()` and join the region texts in reading order."""
+    regions = ocr_layout_regions(image, layout_prompt, **kwargs)
+    return "\n\n".join(region.text for region in regions if region.text)
+
+
+def _normalize_line(line: str) -> str:
+    return " ".join(line.split()).lower()
+
+
+def _is_duplicate_line(line: str, candidates: set[str]) -> bool:
+    if line in candidates:
+        return True
+    if len(line) < MIN_MERGE_CHARS:
+        return False
+    for other in candidates:
+        matcher = SequenceMatcher(None, line, other, autojunk=False)
+        if (
+            matcher.real_quick_ratio() >= MERGE_SIMILARITY
+            and matcher.ratio() >= MERGE_SIMILARITY
+        ):
+            return True
+    return False
+
+
+def overlap_lines(overlap=TILE_OVERLAP, dpi=200) -> int:
+    """Return how many text lines an `overlap` pixel band can touch at `dpi`."""
+    return int(overlap / (MIN_LINE_HEIGHT_PT / 72 * dpi)) + 1
+
+
+def merge_tile_texts(
+    tiles: list[tuple[int, int, str]], band_lines: int | None = None
+) -> str:
+    """Merge the OCR text of overlapping tiles, dropping duplicated lines.
+
+    Tiles are merged in row-major order. Only lines that can lie in an
+    overlap band are compared: a tile's first `band_lines` lines with the
+    last `band_lines` lines of the tiles above it, and each line with the
+    lines around the same relative height in the tile to its left. Repeated
+    text elsewhere on the page is kept. Text that a tile boundary cuts in
+    half can still appear as two fragments.
+
+    Args:
+        tiles: `(row, col, text)` for each tile.
+        band_lines: Lines per overlap band, see `overlap_lines()`. Defaults
+            to `TILE_OVERLAP` pixels at 200 DPI.
+    """
+    if band_lines is None:
+        band_lines = overlap_lines()
+    lines_by_tile = {
+        (row, col): [line for line in text.splitlines() if line.strip()]
+        for row, col, text in tiles
+    }
+    merged = []
+    for row, col, _ in sorted(tiles, key=lambda tile: tile[:2]):
+        lines = lines_by_tile[(row, col)]
+        above = {
+            _normalize_line(line)
+            for d_row, d_col in _ABOVE_NEIGHBOURS
+            for line in lines_by_tile.get((row + d_row, col + d_col), [])[-band_lines:]
+        }
+        left = [_normalize_line(line) for line in lines_by_tile.get((row, col - 1), [])]
+        kept = []
+        for position, line in enumerate(lines):
+            candidates = set(above) if position < band_lines else set()
+            if left:
+                centre = position * len(left) // len(lines)
+                candidates.update(
+                    left[max(0, centre - band_lines) : centre + band_lines + 1]
+                )
+            if not _is_duplicate_line(_normalize_line(line), candidates):
+                kept.append(line)
+        if kept:
+            merged.append("\n".join(kept))
+    return "\n\n".join(merged)
+
+
+def ocr_tiles(
+    tiles: Iterable[tuple[int, int, Image.Image]],
+    prompt: str,
+    max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+    band_lines: int | None = None,
+    **inference_kwargs,
+) -> str:
+    """OCR `(row, col, tile)` tiles concurrently and merge their overlaps.
+
+    `tiles` is consumed lazily, like the pages of `iter_ocr_pages()`.
+    `band_lines` is passed to `merge_tile_texts()`.
+    """
+    positions = []
+
+    def images():
+        for row, col, tile in tiles:
+            positions.append((row, col))
+            yield tile
+
+    texts = ocr_pages(images(), prompt, max_in_flight, **inference_kwargs)
+    return merge_tile_texts(
+        [(row, col, text or "") for (row, col), text in zip(positions, texts)],
+        band_lines,
+    )
+
+
+def ocr_image_tiled(
+    image: Image.Image,
+    prompt: str,
+    max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+    tile_size=TILE_SIZE,
+    overlap=TILE_OVERLAP,
+    dpi=200,
+    **inference_kwargs,
+) -> str:
+    """OCR an image, tiling it first if it exceeds `MAX_PIXELS`.
+
+    `smart_resize` would shrink an oversized image until small text becomes
+    unreadable. Instead it is cut into overlapping `tile_size` tiles that
+    are OCRed concurrently at full resolution and merged with
+    `merge_tile_texts()`. `dpi` is the resolution the image was scanned or
+    rendered at; it sizes the overlap band in text lines. Use text prompts
+    such as `prompt_ocr`; layout JSON of separate tiles cannot be merged
+    this way.
+
+    The result is the tiles' text in row-major order, not the page's reading
+    order: a line that spans several tile columns comes out split into
+    separate blocks, all left parts of a tile row before the parts to their
+    right. This suits posters and drawings with short labels better than
+    wide body text.
+    """
+    if image.width * image.height <= MAX_PIXELS:
+        return inference_with_vllm(image, prompt, **inference_kwargs)
+    tiles = crop_image_tiles(image, tile_size, overlap)
+    band_lines = overlap_lines(overlap, dpi)
+    return ocr_tiles(tiles, prompt, max_in_flight, band_lines, **inference_kwargs)
+
+
+def ocr_pdf(
+    pdf_file: str,
+    prompt: str,
+    dpi=200,
+    start_page_id=0,
+    end_page_id=None,
+    render_workers=0,
+    max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+    two_stage=False,
+    text_layer=False,
+    prefilter=False,
+    tile_oversized=False,
+    **inference_kwargs,
+) -> list[str]:
+    """OCR a PDF page range concurrently and return the results in page order.
+
+    With `render_workers=0` pages are rendered lazily in a background thread.
+    Otherwise they are rasterized on a pool of `render_workers` processes and
+    sent as the PNG bytes the workers produced. Either way each page is
+    rendered once, directly at the size the model resizes it to.
+
+    With `two_stage=True` each page goes through `ocr_page_two_stage()` and
+    `prompt` is the layout prompt (normally `prompt_layout_only_en`).
+
+    With `text_layer=True` born-digital pages (see `classify_pdf_page()`) are
+    extracted locally with PyMuPDF's `get_text` and only scanned or
+    image-heavy pages are rendered and sent to the model. Their text is plain
+    reading-order text, so it cannot be combined with `two_stage`; use it
+    with `prompt_ocr` rather than the layout prompts.
+
+    With `prefilter=True` the pages left for OCR are checked with
+    `prefilter_pdf_pages()` first: blank pages yield `""` and duplicate pages
+    reuse the result of their first occurrence.
+    The number of skipped pages is printed.
+
+    With `tile_oversized=True` pages above `MAX_PIXELS` at `dpi` (posters,
+    large-format drawings) are rendered at full resolution as overlapping
+    tiles instead of being downscaled. The tiles are rendered on demand and
+    share the `max_in_flight` requests with the regular pages; each page's
+    tile texts are joined with `merge_tile_texts()`, in tile order rather
+    than reading order (see `ocr_image_tiled()`). Like `text_layer`, this
+    is meant for text prompts such as `prompt_ocr` and cannot be combined
+    with `two_stage`.
+    """
+    if text_layer and two_stage:
+        raise ValueError(
+            "text_layer yields plain text and cannot be combined with two_stage"
+        )
+    if tile_oversized and two_stage:
+        raise ValueError("tile_oversized cannot be combined with two_stage")
+    texts, page_ids, duplicates = {}, None, {}
+    if text_layer:
+        texts, page_ids = split_pages_by_text_layer(
+            pdf_file, start_page_id, end_page_id
+        )
+    if prefilter:
+        pages = prefilter_pdf_pages(pdf_file, start_page_id, end_page_id, page_ids)
+        page_ids = [p.index for p in pages if not p.blank and p.duplicate_of is None]
+        texts.update((p.index, "") for p in pages if p.blank)
+        duplicates = {
+            p.index: p.duplicate_of for p in pages if p.duplicate_of is not None
+        }
+        print(
+            f"Prefilter: skipped {sum(p.blank for p in pages)} blank and "
+            f"{len(duplicates)} duplicate pages of {len(pages)}"
+        )
+    if tile_oversized and page_ids != []:
+        texts.update(
+            _ocr_pdf_tiled(
+                pdf_file,
+                prompt,
+                dpi,
+                start_page_id,
+                end_page_id,
+                render_workers,
+                max_in_flight,
+                page_ids,
+                **inference_kwargs,
+            )
+        )
+    elif page_ids != []:
+        ocr = None
+        if two_stage:
+            # Pages and their regions share one budget of requests.
+            ocr = ocr_page_two_stage
+            inference_kwargs["request_slots"] = threading.BoundedSemaphore(
+                max_in_flight
+            )
+        images = _render_for_ocr(
+            pdf_file, dpi, start_page_id, end_page_id, render_workers, page_ids
+        )
+        results = ocr_pages(images, prompt, max_in_flight, ocr, **inference_kwargs)
+        if page_ids is None:
+            return results
+        texts.update(zip(page_ids, results))
+    texts.update((index, texts[original]) for index, original in duplicates.items())
+    return [texts[index] for index in sorted(texts)]
+
+
+def _ocr_pdf_tiled(
+    pdf_file,
+    prompt,
+    dpi,
+    start_page_id,
+    end_page_id,
+    render_workers,
+    max_in_flight,
+    page_ids,
+    **inference_kwargs,
+) -> dict[int, str]:
+    regular, oversized = split_oversized_pages(
+        pdf_file, start_page_id, end_page_id, page_ids, dpi
+    )
+    images = _render_for_ocr(
+        pdf_file, dpi, start_page_id, end_page_id, render_workers, regular
+    )
+    oversized = set(oversized)
+    # `(page_index, row, col)` of each image sent, `row = col = None` for a
+    # whole page. Appended before the image is yielded, so it is known by
+    # the time its result arrives.
+    units = []
+
+    def stream():
+        try:
+            for index in sorted(oversized.union(regular)):
+                if index in oversized:
+                    for row, col, tile in iter_pdf_page_tiles(pdf_file, index, dpi):
+                        units.append((index, row, col))
+                        yield tile
+                else:
+                    units.append((index, None, None))
+                    yield next(images)
+        finally:
+            images.close()
+
+    texts, tiles = {}, defaultdict(list)
+    for position, text in iter_ocr_pages(
+        stream(), prompt, max_in_flight, **inference_kwargs
+    ):
+        index, row, col = units[position]
+        if row is None:
+            texts[index] = text
+        else:
+            tiles[index].append((row, col, text or ""))
+    band_lines = overlap_lines(TILE_OVERLAP, dpi)
+    texts.update(
+        (index, merge_tile_texts(tiles[index], band_lines)) for index in oversized
+    )
+    return texts
+
+
+def _render_for_ocr(
+    pdf_file, dpi, start_page_id, end_page_id, render_workers, page_ids
+) -> Iterator[Image.Image | bytes]:
+    if render_workers:
+        pages = render_pdf_pages_parallel(
+            pdf_file,
+            dpi,
+            start_page_id,
+            end_page_id,
+            workers=render_workers,
+            fit_model=True,
+            page_ids=page_ids,
+        )
+        return (data for _, data in pages)
+    return iter_images_from_pdf(
+        pdf_file,
+        dpi,
+        start_page_id,
+        end_page_id,
+        fit_model=True,
+        page_ids=page_ids,
     )
-    return response.choices[0].message.content
 
 
 if __name__ == "__main__":
     image = Image.open("example_data/example_image.jpg")
     prompt = dict_promptmode_to_prompt["prompt_ocr"]
-    response = inference_with_vllm(image, prompt)
+    response = inference_with_vllm(image, prompt, cache=ocr_cache)
     print(response)
 
     pdf_file = "example_data/example_pdf.pdf"
-    pdf_images = load_images_from_pdf(pdf_file)
-    for pdf_image in pdf_images:
-        response = inference_with_vllm(pdf_image, prompt)
+    for response in ocr_pdf(
+        pdf_file,
+        prompt,
+        render_workers=os.cpu_count(),
+        text_layer=True,
+        cache=ocr_cache,
+    ):
         print(response)
+
+    for element in iter_layout_stream(image, cache=ocr_cache):
+        print(element.get("category"), element.get("bbox"), element.get("text"))
+
+    layout_prompt = dict_promptmode_to_prompt["prompt_layout_only_en"]
+    for region in ocr_layout_regions(image, layout_prompt, cache=ocr_cache):
+        print(region.category, region.bbox, region.text)
+    if ocr_cache is not None:
+        print(ocr_cache.stats())
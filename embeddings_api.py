@@ -1,9 +1,18 @@
+import base64
+import functools
+import json
 import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
 
+import numpy as np
 import truststore
-from openai import OpenAI
 
+from utils.clients import get_openai_client
+from utils.embedding_cache import EmbeddingCache
 from utils.get_model import get_model_id
+from utils.vector_index import VectorIndex
 
 truststore.inject_into_ssl()
 
@@ -28,22 +37,233 @@ QUERIES = [
 
 api_key = "{}".format(os.environ.get("API_KEY", "0"))
 api_url = "http://localhost:8000/v1"
-client = OpenAI(api_key=api_key, base_url=api_url)
-model_id = get_model_id(api_key=api_key, api_url=api_url)
+client = get_openai_client(base_url=api_url, api_key=api_key)
+# Optional persistent cache, enabled by setting EMBEDDING_CACHE_PATH.
+embedding_cache = (
+    EmbeddingCache(
+        os.environ["EMBEDDING_CACHE_PATH"],
+        max_bytes=int(os.environ.get("EMBEDDING_CACHE_MAX_BYTES", "0")) or None,
+    )
+    if os.environ.get("EMBEDDING_CACHE_PATH")
+    else None
+)
+
+
+# Sub-batch bounds for `encode_batch()`. Token counts are estimated from the
+# character length (~4 characters per token), which is close enough to keep
+# requests below the server's max batch tokens without a tokenizer.
+DEFAULT_BATCH_SIZE = 64
+DEFAULT_MAX_BATCH_TOKENS = 16384
+DEFAULT_MAX_CONCURRENCY = 8
+CHARS_PER_TOKEN = 4
+# "base64" ships each vector as little-endian float32 bytes, which is decoded
+# straight into the output matrix. "float" is the plain JSON list format.
+DEFAULT_ENCODING_FORMAT = "base64"
+# Number of texts looked up in the cache at once before sending the misses.
+CACHE_LOOKUP_WINDOW = 4096
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def iter_batches(
+    texts: Iterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+) -> Iterator[list[str]]:
+    """Split `texts` into sub-batches bounded by count and estimated tokens.
+
+    A single text larger than `max_batch_tokens` is sent as its own batch and
+    left to the server to truncate.
+    """
+    batch: list[str] = []
+    batch_tokens = 0
+    for text in texts:
+        tokens = _estimate_tokens(text)
+        if batch and (
+            len(batch) >= batch_size or batch_tokens + tokens > max_batch_tokens
+        ):
+            yield batch
+            batch, batch_tokens = [], 0
+        batch.append(text)
+        batch_tokens += tokens
+    if batch:
+        yield batch
+
+
+def decode_base64_embeddings(data: list[dict], dtype=np.float32) -> np.ndarray:
+    """Decode the `data` items of a base64 embeddings response into a matrix.
+
+    Each vector is viewed in place with `np.frombuffer` and copied once into
+    the output, so no intermediate Python floats are created.
+
+    Args:
+        data: The response's `data` list (`{"index": ..., "embedding": str}`).
+        dtype: Output dtype, e.g. `np.float16` to halve memory.
+
+    Returns:
+        np.ndarray: Matrix of shape `(len(data), dim)` ordered by `index`.
+    """
+    if not data:
+        return np.empty((0, 0), dtype=dtype)
+    matrix = None
+    for item in data:
+        vector = np.frombuffer(base64.b64decode(item["embedding"]), dtype="<f4")
+        if matrix is None:
+            matrix = np.empty((len(data), vector.shape[0]), dtype=dtype)
+        matrix[item["index"]] = vector
+    return matrix
+
+
+def _embed_batch(
+    batch: list[str], model_id: str, encoding_format: str, dtype
+) -> np.ndarray:
+    if encoding_format == "base64":
+        # Skip the SDK's response model, which would expand every vector into
+        # a list of Python floats.
+        response = client.embeddings.with_raw_response.create(
+            input=batch, model=model_id, encoding_format="base64"
+        )
+        return decode_base64_embeddings(json.loads(response.content)["data"], dtype)
+
+    response = client.embeddings.create(
+        input=batch, model=model_id, encoding_format="float"
+    )
+    data = sorted(response.data, key=lambda item: item.index)
+    return np.asarray([item.embedding for item in data], dtype=dtype)
+
+
+@functools.cache
+def _embedding_dim(model_id: str, encoding_format: str) -> int:
+    """Return the embedding size of `model_id`, probed with one short text."""
+    return _embed_batch(["dim"], model_id, encoding_format, np.float32).shape[1]
+
+
+def _encode_uncached(
+    texts: Iterable[str],
+    model_id: str,
+    batch_size: int,
+    max_batch_tokens: int,
+    max_concurrency: int,
+    encoding_format: str,
+    dtype,
+) -> np.ndarray:
+    results: dict[int, np.ndarray] = {}
+    with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+        pending = {}
+        for batch_id, batch in enumerate(
+            iter_batches(texts, batch_size, max_batch_tokens)
+        ):
+            if len(pending) >= max_concurrency:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[pending.pop(future)] = future.result()
+            future = executor.submit(
+                _embed_batch, batch, model_id, encoding_format, dtype
+            )
+            pending[future] = batch_id
+        for future, batch_id in pending.items():
+            results[batch_id] = future.result()
+
+    if not results:
+        return np.empty((0, 0), dtype=dtype)
+    return np.concatenate([results[i] for i in range(len(results))], axis=0)
+
+
+def _encode_cached(
+    texts: Iterable[str], model_id: str, cache: EmbeddingCache, dtype, **kwargs
+) -> np.ndarray:
+    parts = []
+    iterator = iter(texts)
+    while window := list(islice(iterator, CACHE_LOOKUP_WINDOW)):
+        vectors = cache.get_many(model_id, window)
+        # Positions of each missing text; repeated texts are embedded once.
+        misses: dict[str, list[int]] = {}
+        for i, vector in enumerate(vectors):
+            if vector is None:
+                misses.setdefault(window[i], []).append(i)
+        if misses:
+            miss_texts = list(misses)
+            # The cache always holds full-precision vectors; the requested
+            # dtype is applied only to the returned matrix.
+            fresh = _encode_uncached(miss_texts, model_id, dtype=np.float32, **kwargs)
+            cache.put_many(model_id, miss_texts, fresh)
+            for positions, vector in zip(misses.values(), fresh):
+                for i in positions:
+                    vectors[i] = vector
+        parts.append(np.stack(vectors).astype(dtype, copy=False))
+
+    if not parts:
+        return np.empty((0, 0), dtype=dtype)
+    return np.concatenate(parts, axis=0)
+
+
+def encode_batch(
+    texts: Iterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_batch_tokens: int = DEFAULT_MAX_BATCH_TOKENS,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    encoding_format: str = DEFAULT_ENCODING_FORMAT,
+    dtype=np.float32,
+    cache: EmbeddingCache | None = None,
+) -> np.ndarray:
+    """Embed an arbitrarily large iterable of texts.
+
+    The input is consumed lazily and split with `iter_batches()`. At most
+    `max_concurrency` sub-batches are in flight at once, all sharing the
+    pooled client.
+
+    Args:
+        texts: Texts to embed. May be a generator.
+        batch_size: Maximum number of texts per request.
+        max_batch_tokens: Maximum estimated tokens per request.
+        max_concurrency: Maximum number of concurrent requests.
+        encoding_format: Wire format, `"base64"` (default) or `"float"`.
+        dtype: Output dtype. Pass `np.float16` to downcast.
+        cache: Optional `EmbeddingCache`. Texts are looked up in windows of
+            `CACHE_LOOKUP_WINDOW` and only the misses are sent to the server.
+
+    Returns:
+        np.ndarray: A C-contiguous matrix of shape `(len(texts), dim)` in
+        input order, also for empty input.
+    """
+    model_id = get_model_id(api_key=api_key, api_url=api_url)
+    kwargs = {
+        "batch_size": batch_size,
+        "max_batch_tokens": max_batch_tokens,
+        "max_concurrency": max_concurrency,
+        "encoding_format": encoding_format,
+    }
+    if cache is None:
+        matrix = _encode_uncached(texts, model_id, dtype=dtype, **kwargs)
+    else:
+        matrix = _encode_cached(texts, model_id, cache, dtype=dtype, **kwargs)
+    if not len(matrix):
+        return np.empty((0, _embedding_dim(model_id, encoding_format)), dtype=dtype)
+    return matrix
 
 
 def encode_documents():
-    client = OpenAI(api_key=api_key, base_url=api_url)
-    response = client.embeddings.create(input=DOCUMENTS, model=model_id)
-    return response.data[0].embedding
+    return encode_batch(DOCUMENTS, cache=embedding_cache)
 
 
 def encode_queries():
-    client = OpenAI(api_key=api_key, base_url=api_url)
-    response = client.embeddings.create(input=QUERIES, model=model_id)
-    return response.data[0].embedding
+    return encode_batch(QUERIES, cache=embedding_cache)
+
+
+def search_documents(k=3):
+    index = VectorIndex(encode_documents())
+    scores, ids = index.search(encode_queries(), k=k)
+    for query, query_scores, query_ids in zip(QUERIES, scores, ids):
+        print(query)
+        for score, doc_id in zip(query_scores, query_ids):
+            print(f"  {score:.3f}  {DOCUMENTS[doc_id]}")
 
 
 if __name__ == "__main__":
     print(encode_documents())
     print(encode_queries())
+    search_documents()
+    if embedding_cache is not None:
+        print(embedding_cache.stats())
@@ -1,27 +1,30 @@
 import base64
 import os
 
-import truststore
-from openai import OpenAI
 import pydantic
+import truststore
+
+from utils.clients import get_openai_client
+from utils.get_model import get_model_id
 
 truststore.inject_into_ssl()
 
-os.environ['no_proxy'] = os.environ.get("api_url", "").replace("https://", "").split("/")[0]
+os.environ["no_proxy"] = (
+    os.environ.get("api_url", "").replace("https://", "").split("/")[0]
+)
 API_URL = os.environ.get("api_url")
 api_key = "{}".format(os.environ.get("API_KEY", "0"))
-client = OpenAI(
-    base_url=API_URL,
-    api_key=api_key,
-)
-models = client.models.list()
-MODEL_ID = models.data[0].id
-print(f"Using model: {MODEL_ID}")
+client = get_openai_client(base_url=API_URL, api_key=api_key)
+
+
+def _get_model_id() -> str:
+    return get_model_id(api_key=api_key, api_url=API_URL)
+
 
 class CityInfo(pydantic.BaseModel):
     city: str
     population: int
-    
+
 
 def encode_base64_content_from_file(file_path: str) -> str:
     """Encode a local file content to base64 format."""
@@ -32,13 +35,14 @@ def encode_base64_content_from_file(file_path: str) -> str:
 
     return result
 
+
 def chat_think():
     messages = [
-        {"role": "user", "content": "Type \"Das DCC hilft dir mit KI.\" backwards"},
+        {"role": "user", "content": 'Type "Das DCC hilft dir mit KI." backwards'},
     ]
 
     chat_response = client.chat.completions.create(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         max_tokens=81920,
         temperature=1.0,
@@ -46,7 +50,7 @@ def chat_think():
         extra_body={
             "top_k": 64,
             "chat_template_kwargs": {"enable_thinking": True},
-        }, 
+        },
     )
 
     result = chat_response.choices[0].message.content
@@ -54,13 +58,14 @@ def chat_think():
     print("Reasoning steps:\n", reasoning)
     print("Chat completion output:\n", result)
 
+
 def chat_non_think():
     messages = [
-        {"role": "user", "content": "Type \"Das DCC hilft dir mit KI.\" backwards"},
+        {"role": "user", "content": 'Type "Das DCC hilft dir mit KI." backwards'},
     ]
 
     chat_response = client.chat.completions.create(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         max_tokens=32768,
         temperature=1.0,
@@ -68,7 +73,7 @@ def chat_non_think():
         extra_body={
             "top_k": 64,
             "chat_template_kwargs": {"enable_thinking": False},
-        }, 
+        },
     )
     result = chat_response.choices[0].message.content
     reasoning = chat_response.choices[0].message.reasoning
@@ -83,19 +88,16 @@ def chat_non_think():
                 {
                     "type": "image_url",
                     "image_url": {
-                         "url": "https://qianwen-res.oss-accelerate.aliyuncs.com/Qwen3.5/demo/RealWorld/RealWorld-04.png"
-                    }
+                        "url": "https://qianwen-res.oss-accelerate.aliyuncs.com/Qwen3.5/demo/RealWorld/RealWorld-04.png"
+                    },
                 },
-                {
-                    "type": "text",
-                    "text": "Where is this?"
-                }
-            ]
+                {"type": "text", "text": "Where is this?"},
+            ],
         }
     ]
 
     chat_response = client.chat.completions.create(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         max_tokens=32768,
         temperature=1,
@@ -103,13 +105,14 @@ def chat_non_think():
         extra_body={
             "top_k": 64,
             "chat_template_kwargs": {"enable_thinking": False},
-        }, 
+        },
     )
     result = chat_response.choices[0].message.content
     reasoning = chat_response.choices[0].message.reasoning
     print("Reasoning steps:\n", reasoning)
     print("Chat completion output:\n", result)
 
+
 def chat_structured():
     messages = [
         {
@@ -117,14 +120,14 @@ def chat_structured():
             "content": [
                 {
                     "type": "text",
-                    "text": f"List 3 cities in Switzerland with population greater than 100,000. Return the result in a JSON array format, with each element containing the city name and its population. Follow this schema: {CityInfo.model_json_schema()}"
+                    "text": f"List 3 cities in Switzerland with population greater than 100,000. Return the result in a JSON array format, with each element containing the city name and its population. Follow this schema: {CityInfo.model_json_schema()}",
                 }
-            ]
+            ],
         }
     ]
 
     chat_response = client.chat.completions.create(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         temperature=1.0,
         top_p=0.95,
@@ -133,13 +136,13 @@ def chat_structured():
             "guided_json": CityInfo.model_json_schema(),
             "chat_template_kwargs": {"enable_thinking": True},
         },
-
     )
     result = chat_response.choices[0].message.content
     reasoning = chat_response.choices[0].message.reasoning
     print("Reasoning steps:\n", reasoning)
     print("Chat completion output:\n", result)
 
+
 def chat_structured_oai():
     messages = [
         {
@@ -147,14 +150,14 @@ def chat_structured_oai():
             "content": [
                 {
                     "type": "text",
-                    "text": f"Return a City in Spain with population greater than 100,000. Follow this schema: {CityInfo.model_json_schema()}"
+                    "text": f"Return a City in Spain with population greater than 100,000. Follow this schema: {CityInfo.model_json_schema()}",
                 }
-            ]
+            ],
         }
     ]
 
     chat_response = client.chat.completions.parse(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         temperature=1.0,
         top_p=0.95,
@@ -164,7 +167,6 @@ def chat_structured_oai():
             "guided_decoding_backend": "outlines",
             "chat_template_kwargs": {"enable_thinking": True},
         },
-
     )
     result = chat_response.choices[0].message.content
     reasoning = chat_response.choices[0].message.reasoning
@@ -184,20 +186,15 @@ def run_image_file():
             "content": [
                 {
                     "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/png;base64,{image_base64}"
-                    }
+                    "image_url": {"url": f"data:image/png;base64,{image_base64}"},
                 },
-                {
-                    "type": "text",
-                    "text": "Where is this?"
-                }
-            ]
+                {"type": "text", "text": "Where is this?"},
+            ],
         }
     ]
 
     response = client.chat.completions.create(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         max_tokens=81920,
         temperature=1.0,
@@ -205,7 +202,7 @@ def run_image_file():
         extra_body={
             "top_k": 64,
             "chat_template_kwargs": {"enable_thinking": True},
-        }, 
+        },
     )
     result = response.choices[0].message.content
     reasoning = response.choices[0].message.reasoning
@@ -213,7 +210,7 @@ def run_image_file():
     print("Chat completion output:\n", result)
 
     response = client.chat.completions.create(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         max_tokens=81920,
         temperature=1.0,
@@ -221,13 +218,14 @@ def run_image_file():
         extra_body={
             "top_k": 64,
             "chat_template_kwargs": {"enable_thinking": True},
-        }, 
+        },
     )
     result = response.choices[0].message.content
     reasoning = response.choices[0].message.reasoning
     print("Reasoning steps:\n", reasoning)
     print("Chat completion output:\n", result)
 
+
 def run_video() -> None:
     video_file = "example_data/shoes.mp4"
     video_base64 = encode_base64_content_from_file(video_file)
@@ -246,14 +244,14 @@ def run_video() -> None:
                 ],
             }
         ],
-        model=MODEL_ID,
+        model=_get_model_id(),
         max_tokens=81920,
         temperature=1.0,
         top_p=0.95,
         extra_body={
             "top_k": 64,
             "chat_template_kwargs": {"enable_thinking": True},
-        }, 
+        },
     )
 
     result = chat_completion_from_base64.choices[0].message.content
@@ -261,6 +259,7 @@ def run_video() -> None:
     print("Reasoning steps:\n", reasoning)
     print("Chat completion output from base64 encoded video:\n", result)
 
+
 def run_video_no_think() -> None:
     video_file = "example_data/output.mp4"
     video_base64 = encode_base64_content_from_file(video_file)
@@ -279,14 +278,14 @@ def run_video_no_think() -> None:
                 ],
             }
         ],
-        model=MODEL_ID,
+        model=_get_model_id(),
         max_tokens=81920,
         temperature=1.0,
         top_p=0.95,
         extra_body={
             "top_k": 64,
             "chat_template_kwargs": {"enable_thinking": False},
-        }, 
+        },
     )
 
     result = chat_completion_from_base64.choices[0].message.content
@@ -296,6 +295,7 @@ def run_video_no_think() -> None:
 
 
 if __name__ == "__main__":
+    print(f"Using model: {_get_model_id()}")
     print("=== Test Chat with thinking enabled ===")
     chat_think()
     print("=== Test Chat with thinking disabled ===")
@@ -309,4 +309,4 @@ if __name__ == "__main__":
     print("\n=== Test Video with thinking enabled ===")
     run_video()
     print("\n=== Test Video with thinking disabled ===")
-    run_video_no_think()
\ No newline at end of file
+    run_video_no_think()
@@ -1,10 +1,11 @@
 import os
-import base64
-import io
-from PIL import Image
-import httpx
+
 import truststore
-from openai import OpenAI
+from PIL import Image
+
+from utils.clients import auth_headers, get_http_client, get_openai_client
+from utils.dots_ocr_utils import image_file_to_base64
+from utils.ocr_cache import image_digest, ocr_cache_from_env, ocr_cache_key
 
 truststore.inject_into_ssl()
 
@@ -13,21 +14,25 @@ API_URL = os.environ.get("api_url", "http://localhost:8000/v1")
 API_KEY = os.environ.get("API_KEY", "none")
 MODEL_NAME = "zai-org/GLM-OCR"
 CUSTOM_PROMPT = "Recognize the text in the image and output in Markdown format. Preserve the original layout (headings/paragraphs/tables/formulas). Do not fabricate content that does not exist in the image."
-os.environ['no_proxy'] = os.environ.get("API_URL", "").replace("https://", "").split("/")[0]
+os.environ["no_proxy"] = (
+    os.environ.get("API_URL", "").replace("https://", "").split("/")[0]
+)
 
 modes = {
     "text": "Text Recognition:",
     "formula": "Formula Recognition:",
-    "table": "Table Recognition:"
+    "table": "Table Recognition:",
 }
 MODE = "text"  # Change to "formula" or "table" as needed
 
+# Optional persistent result cache, enabled by setting OCR_CACHE_PATH.
+ocr_cache = ocr_cache_from_env()
+
+
 def encode_image_to_base64(image_path: str) -> str:
-    with Image.open(image_path) as img:
-        buf = io.BytesIO()
-        img.save(buf, format="PNG")
-        b64_string = base64.b64encode(buf.getvalue()).decode()
-    return f"data:image/png;base64,{b64_string}"
+    # Sends PNG/JPEG/WebP files as they are instead of re-encoding to PNG.
+    return image_file_to_base64(image_path)
+
 
 def use_httpx(image_data_uri: str):
     payload = {
@@ -40,7 +45,7 @@ def use_httpx(image_data_uri: str):
                         "type": "text",
                         "text": CUSTOM_PROMPT,
                     }
-                ]
+                ],
             },
             {
                 "role": "user",
@@ -48,19 +53,24 @@ def use_httpx(image_data_uri: str):
                     {"type": "text", "text": modes[MODE]},
                     {"type": "image_url", "image_url": {"url": image_data_uri}},
                 ],
-            }
+            },
         ],
     }
-    
-    with httpx.Client(timeout=30.0) as client:
-        client.headers.update({"Authorization": f"Bearer {API_KEY}"})
-        response = client.post(API_URL + "/chat/completions", json=payload)
-        response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+
+    client = get_http_client(API_URL)
+    response = client.post(
+        API_URL + "/chat/completions",
+        json=payload,
+        headers=auth_headers(API_KEY),
+        timeout=30.0,
+    )
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"]
+
 
 def use_openai_sdk(image_data_uri: str):
-    client = OpenAI(base_url=API_URL, api_key=API_KEY)
-    
+    client = get_openai_client(base_url=API_URL, api_key=API_KEY)
+
     response = client.chat.completions.create(
         model=MODEL_NAME,
         messages=[
@@ -75,14 +85,33 @@ def use_openai_sdk(image_data_uri: str):
     )
     return response.choices[0].message.content
 
+
+def ocr_image(image_path: str, use=use_httpx) -> str:
+    """OCR an image file with `use_httpx` or `use_openai_sdk`, cached if enabled."""
+    if ocr_cache is None:
+        return use(encode_image_to_base64(image_path))
+    with Image.open(image_path) as img:
+        digest = image_digest(img)
+    key = ocr_cache_key(
+        digest, CUSTOM_PROMPT, MODEL_NAME, mode=modes[MODE], client=use.__name__
+    )
+    if (cached := ocr_cache.get(key)) is not None:
+        return cached
+    text = use(encode_image_to_base64(image_path))
+    ocr_cache.put(key, text)
+    return text
+
+
 if __name__ == "__main__":
     # Path to your document image or crop
     test_image = "example_data/example_image.jpg"
     test_image = "example_data/example_image_2.png"
-    image_uri = encode_image_to_base64(test_image)
 
     print("--- Testing via HTTPX ---")
-    print(use_httpx(image_uri))
+    print(ocr_image(test_image, use_httpx))
 
     print("\n--- Testing via OpenAI SDK ---")
-    print(use_openai_sdk(image_uri))
\ No newline at end of file
+    print(ocr_image(test_image, use_openai_sdk))
+
+    if ocr_cache is not None:
+        print(ocr_cache.stats())
@@ -1,24 +1,31 @@
 import os
 
 import truststore
-from openai import OpenAI
+
+from utils.clients import get_openai_client
+from utils.get_model import get_model_id
 
 truststore.inject_into_ssl()
 
 API_URL = os.environ.get("api_url")
 api_key = "{}".format(os.environ.get("API_KEY", "0"))
-client = OpenAI(
-    base_url=API_URL,
-    api_key=api_key,
-)
-models = client.models.list()
-MODEL_ID = models.data[0].id
+client = get_openai_client(base_url=API_URL, api_key=api_key)
+
+
+def _get_model_id() -> str:
+    return get_model_id(api_key=api_key, api_url=API_URL)
 
 
 def completition_chat():
     completion = client.chat.completions.create(
-        model=MODEL_ID, messages=[{"role": "user", "content": "Hello! Write me a very long poem please. /nothink"}],
-        stream=True
+        model=_get_model_id(),
+        messages=[
+            {
+                "role": "user",
+                "content": "Hello! Write me a very long poem please. /nothink",
+            }
+        ],
+        stream=True,
     )
     for chunk in completion:
         if chunk.choices[0].delta.content:
@@ -28,7 +35,9 @@ def completition_chat():
 
 
 def completition_create():
-    completion = client.completions.create(model=MODEL_ID, prompt="Hy my name is")
+    completion = client.completions.create(
+        model=_get_model_id(), prompt="Hy my name is"
+    )
     print(completion.choices[0].text)
 
 
@@ -2,20 +2,21 @@ import os
 from enum import Enum
 
 import truststore
-from openai import OpenAI
 from pydantic import BaseModel
 
+from utils.clients import get_openai_client
+from utils.get_model import get_model_id
+
 truststore.inject_into_ssl()
 
 api_key = "{}".format(os.environ.get("API_KEY", "0"))
 api_url = "http://localhost:8000/v1"
 
-client = OpenAI(api_key=api_key, base_url=api_url)
+client = get_openai_client(base_url=api_url, api_key=api_key)
 
 
 def _get_model_id() -> str:
-    models = client.models.list()
-    return models.data[0].id
+    return get_model_id(api_key=api_key, api_url=api_url)
 
 
 def structured_output_decode_by_choice():
@@ -46,7 +47,7 @@ def structured_output_decode_by_regex():
                 "content": prompt,
             }
         ],
-        extra_body={"guided_regex": "\w+@\w+\.com\n", "stop": ["\n"]},
+        extra_body={"guided_regex": r"\w+@\w+\.com\n", "stop": ["\n"]},
     )
     print(completion.choices[0].message.content)
 
@@ -2,20 +2,16 @@ import json
 import os
 
 import truststore
-from openai import OpenAI
+
+from utils.clients import get_openai_client
+from utils.get_model import get_model_id
 
 truststore.inject_into_ssl()
 
 openai_api_key = "{}".format(os.environ.get("API_KEY", "0"))
 openai_api_base = "http://localhost:8000/v1"
 
-client = OpenAI(
-    api_key=openai_api_key,
-    base_url=openai_api_base,
-)
-
-models = client.models.list()
-model = models.data[0].id
+client = get_openai_client(base_url=openai_api_base, api_key=openai_api_key)
 
 tools = [
     {
@@ -56,84 +52,96 @@ messages = [
     },
 ]
 
-chat_completion = client.chat.completions.create(
-    messages=messages, model=model, tools=tools
-)
 
-print("Chat completion results:")
-print(chat_completion)
-print("\n\n")
+# Simulated tool used to answer the tool call
+def get_current_weather(city: str, state: str, unit: "str"):
+    return (
+        "The weather in Dallas, Texas is 85 degrees fahrenheit. It is "
+        "partly cloudly, with highs in the 90's."
+    )
+
 
-tool_calls_stream = client.chat.completions.create(
-    messages=messages, model=model, tools=tools, stream=True
-)
+available_tools = {"get_current_weather": get_current_weather}
 
-chunks = []
-for chunk in tool_calls_stream:
-    chunks.append(chunk)
-    if chunk.choices[0].delta.tool_calls:
-        print(chunk.choices[0].delta.tool_calls[0])
-    else:
-        print(chunk.choices[0].delta)
 
-arguments = []
-tool_call_idx = -1
-for chunk in chunks:
-    if chunk.choices[0].delta.tool_calls:
-        tool_call = chunk.choices[0].delta.tool_calls[0]
+def main():
+    model = get_model_id(api_key=openai_api_key, api_url=openai_api_base)
 
-        if tool_call.index != tool_call_idx:
-            if tool_call_idx >= 0:
-                print(f"streamed tool call arguments: {arguments[tool_call_idx]}")
-            tool_call_idx = chunk.choices[0].delta.tool_calls[0].index
-            arguments.append("")
-        if tool_call.id:
-            print(f"streamed tool call id: {tool_call.id} ")
+    chat_completion = client.chat.completions.create(
+        messages=messages, model=model, tools=tools
+    )
 
-        if tool_call.function:
-            if tool_call.function.name:
-                print(f"streamed tool call name: {tool_call.function.name}")
+    print("Chat completion results:")
+    print(chat_completion)
+    print("\n\n")
 
-            if tool_call.function.arguments:
-                arguments[tool_call_idx] += tool_call.function.arguments
+    tool_calls_stream = client.chat.completions.create(
+        messages=messages, model=model, tools=tools, stream=True
+    )
 
-if len(arguments):
-    print(f"streamed tool call arguments: {arguments[-1]}")
+    chunks = []
+    for chunk in tool_calls_stream:
+        chunks.append(chunk)
+        if chunk.choices[0].delta.tool_calls:
+            print(chunk.choices[0].delta.tool_calls[0])
+        else:
+            print(chunk.choices[0].delta)
 
-print("\n\n")
+    arguments = []
+    tool_call_idx = -1
+    for chunk in chunks:
+        if chunk.choices[0].delta.tool_calls:
+            tool_call = chunk.choices[0].delta.tool_calls[0]
 
-messages.append(
-    {"role": "assistant", "tool_calls": chat_completion.choices[0].message.tool_calls}
-)
+            if tool_call.index != tool_call_idx:
+                if tool_call_idx >= 0:
+                    print(f"streamed tool call arguments: {arguments[tool_call_idx]}")
+                tool_call_idx = chunk.choices[0].delta.tool_calls[0].index
+                arguments.append("")
+            if tool_call.id:
+                print(f"streamed tool call id: {tool_call.id} ")
 
+            if tool_call.function:
+                if tool_call.function.name:
+                    print(f"streamed tool call name: {tool_call.function.name}")
 
-# Now, simulate a tool call
-def get_current_weather(city: str, state: str, unit: "str"):
-    return (
-        "The weather in Dallas, Texas is 85 degrees fahrenheit. It is "
-        "partly cloudly, with highs in the 90's."
-    )
+                if tool_call.function.arguments:
+                    arguments[tool_call_idx] += tool_call.function.arguments
 
+    if len(arguments):
+        print(f"streamed tool call arguments: {arguments[-1]}")
 
-available_tools = {"get_current_weather": get_current_weather}
+    print("\n\n")
 
-completion_tool_calls = chat_completion.choices[0].message.tool_calls
-for call in completion_tool_calls:
-    tool_to_call = available_tools[call.function.name]
-    args = json.loads(call.function.arguments)
-    result = tool_to_call(**args)
-    print(result)
     messages.append(
         {
-            "role": "tool",
-            "content": result,
-            "tool_call_id": call.id,
-            "name": call.function.name,
+            "role": "assistant",
+            "tool_calls": chat_completion.choices[0].message.tool_calls,
         }
     )
 
-chat_completion_2 = client.chat.completions.create(
-    messages=messages, model=model, tools=tools, stream=False
-)
-print("\n\n")
-print(chat_completion_2)
+    # Now, simulate a tool call
+    completion_tool_calls = chat_completion.choices[0].message.tool_calls
+    for call in completion_tool_calls:
+        tool_to_call = available_tools[call.function.name]
+        args = json.loads(call.function.arguments)
+        result = tool_to_call(**args)
+        print(result)
+        messages.append(
+            {
+                "role": "tool",
+                "content": result,
+                "tool_call_id": call.id,
+                "name": call.function.name,
+            }
+        )
+
+    chat_completion_2 = client.chat.completions.create(
+        messages=messages, model=model, tools=tools, stream=False
+    )
+    print("\n\n")
+    print(chat_completion_2)
+
+
+if __name__ == "__main__":
+    main()
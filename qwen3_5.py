@@ -1,27 +1,30 @@
 import base64
 import os
 
-import truststore
-from openai import OpenAI
 import pydantic
+import truststore
+
+from utils.clients import get_openai_client
+from utils.get_model import get_model_id
 
 truststore.inject_into_ssl()
 
-os.environ['no_proxy'] = os.environ.get("api_url", "").replace("https://", "").split("/")[0]
+os.environ["no_proxy"] = (
+    os.environ.get("api_url", "").replace("https://", "").split("/")[0]
+)
 API_URL = os.environ.get("api_url")
 api_key = "{}".format(os.environ.get("API_KEY", "0"))
-client = OpenAI(
-    base_url=API_URL,
-    api_key=api_key,
-)
-models = client.models.list()
-MODEL_ID = models.data[0].id
-print(f"Using model: {MODEL_ID}")
+client = get_openai_client(base_url=API_URL, api_key=api_key)
+
+
+def _get_model_id() -> str:
+    return get_model_id(api_key=api_key, api_url=API_URL)
+
 
 class CityInfo(pydantic.BaseModel):
     city: str
     population: int
-    
+
 
 def encode_base64_content_from_file(file_path: str) -> str:
     """Encode a local file content to base64 format."""
@@ -32,13 +35,14 @@ def encode_base64_content_from_file(file_path: str) -> str:
 
     return result
 
+
 def chat_think():
     messages = [
-        {"role": "user", "content": "Type \"Das DCC hilft dir mit KI.\" backwards"},
+        {"role": "user", "content": 'Type "Das DCC hilft dir mit KI." backwards'},
     ]
 
     chat_response = client.chat.completions.create(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         max_tokens=81920,
         temperature=1.0,
@@ -46,7 +50,7 @@ def chat_think():
         presence_penalty=1.5,
         extra_body={
             "top_k": 20,
-        }, 
+        },
     )
 
     result = chat_response.choices[0].message.content
@@ -54,13 +58,14 @@ def chat_think():
     print("Reasoning steps:\n", reasoning)
     print("Chat completion output:\n", result)
 
+
 def chat_non_think():
     messages = [
-        {"role": "user", "content": "Type \"Das DCC hilft dir mit KI.\" backwards"},
+        {"role": "user", "content": 'Type "Das DCC hilft dir mit KI." backwards'},
     ]
 
     chat_response = client.chat.completions.create(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         max_tokens=32768,
         temperature=0.7,
@@ -69,7 +74,7 @@ def chat_non_think():
         extra_body={
             "top_k": 20,
             "chat_template_kwargs": {"enable_thinking": False},
-        }, 
+        },
     )
     result = chat_response.choices[0].message.content
     reasoning = chat_response.choices[0].message.reasoning
@@ -84,19 +89,16 @@ def chat_non_think():
                 {
                     "type": "image_url",
                     "image_url": {
-                         "url": "https://qianwen-res.oss-accelerate.aliyuncs.com/Qwen3.5/demo/RealWorld/RealWorld-04.png"
-                    }
+                        "url": "https://qianwen-res.oss-accelerate.aliyuncs.com/Qwen3.5/demo/RealWorld/RealWorld-04.png"
+                    },
                 },
-                {
-                    "type": "text",
-                    "text": "Where is this?"
-                }
-            ]
+                {"type": "text", "text": "Where is this?"},
+            ],
         }
     ]
 
     chat_response = client.chat.completions.create(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         max_tokens=32768,
         temperature=0.7,
@@ -105,13 +107,14 @@ def chat_non_think():
         extra_body={
             "top_k": 20,
             "chat_template_kwargs": {"enable_thinking": False},
-        }, 
+        },
     )
     result = chat_response.choices[0].message.content
     reasoning = chat_response.choices[0].message.reasoning
     print("Reasoning steps:\n", reasoning)
     print("Chat completion output:\n", result)
 
+
 def chat_structured():
     messages = [
         {
@@ -119,14 +122,14 @@ def chat_structured():
             "content": [
                 {
                     "type": "text",
-                    "text": f"List 3 cities in Switzerland with population greater than 100,000. Return the result in a JSON array format, with each element containing the city name and its population. Follow this schema: {CityInfo.model_json_schema()}"
+                    "text": f"List 3 cities in Switzerland with population greater than 100,000. Return the result in a JSON array format, with each element containing the city name and its population. Follow this schema: {CityInfo.model_json_schema()}",
                 }
-            ]
+            ],
         }
     ]
 
     chat_response = client.chat.completions.create(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         temperature=1.0,
         top_p=0.95,
@@ -135,13 +138,13 @@ def chat_structured():
             "top_k": 20,
             "guided_json": CityInfo.model_json_schema(),
         },
-
     )
     result = chat_response.choices[0].message.content
     reasoning = chat_response.choices[0].message.reasoning
     print("Reasoning steps:\n", reasoning)
     print("Chat completion output:\n", result)
 
+
 def chat_structured_oai():
     messages = [
         {
@@ -149,14 +152,14 @@ def chat_structured_oai():
             "content": [
                 {
                     "type": "text",
-                    "text": f"Return a City in Spain with population greater than 100,000. Follow this schema: {CityInfo.model_json_schema()}"
+                    "text": f"Return a City in Spain with population greater than 100,000. Follow this schema: {CityInfo.model_json_schema()}",
                 }
-            ]
+            ],
         }
     ]
 
     chat_response = client.chat.completions.parse(
-        model=MODEL_ID,
+        model=_get_model_id(),
         messages=messages,
         temperature=1.0,
         top_p=0.95,
@@ -166,7 +169,6 @@ def chat_structured_oai():
             "top_k": 20,
             "guided_decoding_backend": "outlines",
         },
-
     )
     result = chat_response.choices[0].message.content
     reasoning = chat_response.choices[0].message.reasoning
@@ -186,15 +188,10 @@ def run_image_file():
             "content": [
                 {
                     "type": "image_url",
-                    "image_url": {
-                        "url": f"data:image/png;base64,{image_base64}"
-                    }
+                    "image_url": {"url": f"data:image/png;base64,{image_base64}"},
                 },
-                {
-                    "type": "text",
-                    "text": "Where is this?"
-                }
-            ]
+                {"type": "text", "text": "Where is this?"},
+            ],
         }
     ]
 
@@ -207,7 +204,7 @@ def run_image_file():
         presence_penalty=1.5,
         extra_body={
             "top_k": 20,
-        }, 
+        },
     )
     result = response.choices[0].message.content
     reasoning = response.choices[0].message.reasoning
@@ -223,13 +220,14 @@ def run_image_file():
         presence_penalty=1.5,
         extra_body={
             "top_k": 20,
-        }, 
+        },
     )
     result = response.choices[0].message.content
     reasoning = response.choices[0].message.reasoning
     print("Reasoning steps:\n", reasoning)
     print("Chat completion output:\n", result)
 
+
 def run_video() -> None:
     video_file = "example_data/shoes.mp4"
     video_base64 = encode_base64_content_from_file(video_file)
@@ -248,14 +246,14 @@ def run_video() -> None:
                 ],
             }
         ],
-        model=MODEL_ID,
+        model=_get_model_id(),
         max_tokens=81920,
         temperature=1.0,
         top_p=0.95,
         presence_penalty=1.5,
         extra_body={
             "top_k": 20,
-        }, 
+        },
     )
 
     result = chat_completion_from_base64.choices[0].message.content
@@ -263,6 +261,7 @@ def run_video() -> None:
     print("Reasoning steps:\n", reasoning)
     print("Chat completion output from base64 encoded video:\n", result)
 
+
 def run_video_no_think() -> None:
     video_file = "example_data/output.mp4"
     video_base64 = encode_base64_content_from_file(video_file)
@@ -281,7 +280,7 @@ def run_video_no_think() -> None:
                 ],
             }
         ],
-        model=MODEL_ID,
+        model=_get_model_id(),
         max_tokens=81920,
         temperature=1.0,
         top_p=0.95,
@@ -289,7 +288,7 @@ def run_video_no_think() -> None:
         extra_body={
             "top_k": 20,
             "chat_template_kwargs": {"enable_thinking": False},
-        }, 
+        },
     )
 
     result = chat_completion_from_base64.choices[0].message.content
@@ -299,6 +298,7 @@ def run_video_no_think() -> None:
 
 
 if __name__ == "__main__":
+    print(f"Using model: {_get_model_id()}")
     print("=== Test Chat with thinking enabled ===")
     chat_think()
     print("=== Test Chat with thinking disabled ===")
@@ -312,4 +312,4 @@ if __name__ == "__main__":
     print("\n=== Test Video with thinking enabled ===")
     run_video()
     print("\n=== Test Video with thinking disabled ===")
-    run_video_no_think()
\ No newline at end of file
+    run_video_no_think()
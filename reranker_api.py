@@ -1,14 +1,17 @@
+import asyncio
 import os
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 
 import truststore
 
+from utils.clients import get_async_http_client, get_http_client
 from utils.get_model import get_model_id
 
 truststore.inject_into_ssl()
 import json
 
-import requests
-
 DOCUMENTS = [
     "This is an example sentence. It is used for testing purposes. It has no real meaning.",
     "The quick brown fox jumps over the lazy dog. This is a pangram. It contains every letter of the alphabet.",
@@ -22,36 +25,242 @@ DOCUMENTS = [
     "I'm planning a trip to Europe next year. I'm going to visit several different countries. I'm really looking forward to it.",
 ]
 QUERY = "What is machine learning?"
+QUERIES = [
+    QUERY,
+    "Tell me about Python.",
+    "Sports and hobbies",
+    "Weather forecast",
+]
 
 api_key = "{}".format(os.environ.get("API_KEY", "0"))
 api_url = "http://localhost:8000/rerank"
 openai_api_url = api_url.replace("/rerank", "/v1")
-model_id = get_model_id(api_key=api_key, api_url=openai_api_url)
-print(model_id)
+
+
+DEFAULT_MAX_CONCURRENCY = 16
+# Long-document mode. Windows are counted in whitespace-separated words, which
+# stays below the reranker's token limit for typical text (~1.3 tokens/word).
+DEFAULT_WINDOW_WORDS = 256
+DEFAULT_WINDOW_OVERLAP = 64
+DEFAULT_WINDOWS_PER_REQUEST = 32
+
+
+@dataclass
+class RerankScore:
+    index: int
+    relevance_score: float
+    document: str
+
+
+@dataclass
+class DocumentScore:
+    index: int
+    relevance_score: float
+    document: str
+    best_window: str
+
+
+def split_windows(
+    text: str,
+    window_words: int = DEFAULT_WINDOW_WORDS,
+    overlap: int = DEFAULT_WINDOW_OVERLAP,
+) -> list[str]:
+    """Split `text` into windows of `window_words` words overlapping by `overlap`."""
+    if overlap >= window_words:
+        raise ValueError("overlap must be smaller than window_words")
+    words = text.split()
+    if len(words) <= window_words:
+        return [" ".join(words)]
+    step = window_words - overlap
+    starts = range(0, len(words) - overlap, step)
+    return [" ".join(words[start : start + window_words]) for start in starts]
+
+
+class RerankClient:
+    """Rerank client on the shared connection pool, with batch and async APIs.
+
+    Args:
+        api_url: The `/rerank` endpoint.
+        api_key: API key sent as Bearer token.
+        max_concurrency: Maximum number of requests in flight in
+            `rerank_many()` / `arerank_many()`.
+    """
+
+    def __init__(
+        self,
+        api_url: str = api_url,
+        api_key: str = api_key,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.openai_api_url = api_url.replace("/rerank", "/v1")
+        self.max_concurrency = max_concurrency
+        self.headers = {
+            "accept": "application/json",
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}",
+        }
+
+    def _payload(self, query: str, documents: list[str]) -> dict:
+        return {
+            "model": get_model_id(api_key=self.api_key, api_url=self.openai_api_url),
+            "query": query,
+            "documents": documents,
+        }
+
+    @staticmethod
+    def _scores(body: dict, documents: list[str]) -> list[RerankScore]:
+        scores = [
+            RerankScore(
+                index=result["index"],
+                relevance_score=result["relevance_score"],
+                document=documents[result["index"]],
+            )
+            for result in body["results"]
+        ]
+        return sorted(scores, key=lambda score: score.relevance_score, reverse=True)
+
+    def rerank(self, query: str, documents: list[str]) -> list[RerankScore]:
+        """Rerank `documents` for `query`, sorted by descending score.
+
+        Raises:
+            httpx.HTTPStatusError: If the server does not answer with 2xx.
+        """
+        response = get_http_client(self.api_url).post(
+            self.api_url, headers=self.headers, json=self._payload(query, documents)
+        )
+        response.raise_for_status()
+        return self._scores(response.json(), documents)
+
+    def rerank_many(
+        self, pairs: Iterable[tuple[str, list[str]]]
+    ) -> list[list[RerankScore]]:
+        """Rerank many (query, documents) pairs concurrently, in input order."""
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(executor.map(lambda pair: self.rerank(*pair), pairs))
+
+    async def arerank(self, query: str, documents: list[str]) -> list[RerankScore]:
+        """Async variant of `rerank()`."""
+        # Resolve the (cached) model ID off the event loop.
+        payload = await asyncio.to_thread(self._payload, query, documents)
+        response = await get_async_http_client(self.api_url).post(
+            self.api_url, headers=self.headers, json=payload
+        )
+        response.raise_for_status()
+        return self._scores(response.json(), documents)
+
+    async def arerank_many(
+        self, pairs: Iterable[tuple[str, list[str]]]
+    ) -> list[list[RerankScore]]:
+        """Async variant of `rerank_many()`."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(query: str, documents: list[str]) -> list[RerankScore]:
+            async with semaphore:
+                return await self.arerank(query, documents)
+
+        return await asyncio.gather(*(bounded(q, docs) for q, docs in pairs))
+
+    def rerank_long(
+        self,
+        query: str,
+        documents: list[str],
+        window_words: int = DEFAULT_WINDOW_WORDS,
+        overlap: int = DEFAULT_WINDOW_OVERLAP,
+        pooling: str = "max",
+        windows_per_request: int = DEFAULT_WINDOWS_PER_REQUEST,
+    ) -> list[DocumentScore]:
+        """Rerank long documents by scoring overlapping windows.
+
+        Every document is split with `split_windows()`. Identical windows
+        (e.g. shared boilerplate) are scored only once, in concurrent requests
+        of `windows_per_request` windows each. Window scores are pooled per
+        document.
+
+        Args:
+            query: The query.
+            documents: Documents of any length.
+            window_words: Window size in words.
+            overlap: Words shared by consecutive windows.
+            pooling: `"max"` (best window) or `"mean"` (average of windows).
+            windows_per_request: Windows sent per `/rerank` request.
+
+        Returns:
+            list[DocumentScore]: One score per document, sorted by descending
+            score. `best_window` is the highest-scoring window.
+        """
+        if pooling not in ("max", "mean"):
+            raise ValueError(f"pooling must be 'max' or 'mean', got {pooling!r}")
+
+        unique_windows: dict[str, int] = {}
+        document_windows = []
+        for document in documents:
+            window_ids = [
+                unique_windows.setdefault(window, len(unique_windows))
+                for window in split_windows(document, window_words, overlap)
+            ]
+            document_windows.append(window_ids)
+
+        windows = list(unique_windows)
+        batches = [
+            windows[start : start + windows_per_request]
+            for start in range(0, len(windows), windows_per_request)
+        ]
+        window_scores = [0.0] * len(windows)
+        results = self.rerank_many((query, batch) for batch in batches)
+        for batch_number, scores in enumerate(results):
+            offset = batch_number * windows_per_request
+            for score in scores:
+                window_scores[offset + score.index] = score.relevance_score
+
+        document_scores = []
+        for index, (document, window_ids) in enumerate(
+            zip(documents, document_windows)
+        ):
+            scores = [window_scores[window_id] for window_id in window_ids]
+            best = max(range(len(scores)), key=scores.__getitem__)
+            pooled = scores[best] if pooling == "max" else sum(scores) / len(scores)
+            document_scores.append(
+                DocumentScore(
+                    index=index,
+                    relevance_score=pooled,
+                    document=document,
+                    best_window=windows[window_ids[best]],
+                )
+            )
+        return sorted(document_scores, key=lambda s: s.relevance_score, reverse=True)
+
+
+def rerank_documents(query: str, documents: list[str]) -> list[RerankScore]:
+    """Rerank `documents` for `query` with the default `RerankClient`."""
+    return RerankClient().rerank(query, documents)
 
 
 def rerank():
-    headers = {
-        "accept": "application/json",
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}",
-    }
-
-    data = {
-        "model": model_id,
-        "query": QUERY,
-        "documents": DOCUMENTS,
-    }
-    response = requests.post(api_url, headers=headers, json=data)
-
-    if response.status_code == 200:
-        print("Request successful!")
-        print(json.dumps(response.json(), indent=2))
-    else:
+    client = RerankClient()
+    response = get_http_client(api_url).post(
+        api_url, headers=client.headers, json=client._payload(QUERY, DOCUMENTS)
+    )
+
+    if response.status_code != 200:
         print(f"Request failed with status code: {response.status_code}")
         print(response.text)
+        return None
+    print("Request successful!")
+    print(json.dumps(response.json(), indent=2))
     return response.json()
 
 
+def rerank_queries():
+    client = RerankClient()
+    pairs = [(query, DOCUMENTS) for query in QUERIES]
+    for query, scores in zip(QUERIES, client.rerank_many(pairs)):
+        print(query)
+        for score in scores[:3]:
+            print(f"  {score.relevance_score:.3f}  {score.document}")
+
+
 if __name__ == "__main__":
     rerank()
+    rerank_queries()
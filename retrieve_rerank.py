@@ -0,0 +1,103 @@
+"""Two-stage retrieve-then-rerank over a document collection.
+
+Stage 1 embeds the query and takes the `top_n` most similar documents from a
+local `VectorIndex` (built once over the document embeddings). Stage 2 sends
+only those candidates to the `/rerank` endpoint, so the cross-encoder cost per
+query stays constant as the collection grows.
+
+Every query reports the latency of each stage in milliseconds.
+"""
+
+import time
+from dataclasses import dataclass, field
+
+from embeddings_api import DOCUMENTS, QUERIES, embedding_cache, encode_batch
+from reranker_api import rerank_documents
+from utils.vector_index import VectorIndex
+
+DEFAULT_TOP_N = 50
+DEFAULT_TOP_K = 5
+
+
+@dataclass
+class RankedDocument:
+    index: int
+    document: str
+    similarity: float
+    relevance_score: float
+
+
+@dataclass
+class PipelineResult:
+    query: str
+    results: list[RankedDocument]
+    timings_ms: dict[str, float] = field(default_factory=dict)
+
+
+class RetrieveRerankPipeline:
+    """Embedding retrieval followed by cross-encoder reranking.
+
+    Args:
+        documents: The document collection.
+        top_n: Number of retrieved candidates sent to the reranker.
+        index: Optional prebuilt `VectorIndex` over `documents` (e.g. loaded
+            with `VectorIndex.load()`). Built with `encode_batch()` otherwise.
+    """
+
+    def __init__(
+        self,
+        documents: list[str],
+        top_n: int = DEFAULT_TOP_N,
+        index: VectorIndex | None = None,
+    ):
+        self.documents = documents
+        self.top_n = top_n
+        start = time.perf_counter()
+        if index is None:
+            index = VectorIndex(encode_batch(documents, cache=embedding_cache))
+        self.index = index
+        self.index_ms = (time.perf_counter() - start) * 1000
+
+    def query(self, query: str, top_k: int = DEFAULT_TOP_K) -> PipelineResult:
+        """Return the `top_k` reranked documents for `query`."""
+        timings = {}
+        start = time.perf_counter()
+        query_vector = encode_batch([query], cache=embedding_cache)
+        timings["embed_query"] = (time.perf_counter() - start) * 1000
+
+        stage_start = time.perf_counter()
+        similarities, candidate_ids = self.index.search(query_vector, k=self.top_n)
+        similarities, candidate_ids = similarities[0], candidate_ids[0]
+        timings["retrieve"] = (time.perf_counter() - stage_start) * 1000
+
+        stage_start = time.perf_counter()
+        candidates = [self.documents[i] for i in candidate_ids]
+        # An empty collection has no candidates to send to the reranker.
+        reranked = rerank_documents(query, candidates) if candidates else []
+        timings["rerank"] = (time.perf_counter() - stage_start) * 1000
+        timings["total"] = (time.perf_counter() - start) * 1000
+
+        results = [
+            RankedDocument(
+                index=int(candidate_ids[score.index]),
+                document=score.document,
+                similarity=float(similarities[score.index]),
+                relevance_score=score.relevance_score,
+            )
+            for score in reranked[:top_k]
+        ]
+        return PipelineResult(query=query, results=results, timings_ms=timings)
+
+
+if __name__ == "__main__":
+    pipeline = RetrieveRerankPipeline(DOCUMENTS, top_n=5)
+    print(f"Indexed {len(DOCUMENTS)} documents in {pipeline.index_ms:.1f} ms")
+    for query in QUERIES:
+        result = pipeline.query(query, top_k=3)
+        timings = ", ".join(f"{k}={v:.1f} ms" for k, v in result.timings_ms.items())
+        print(f"{query} ({timings})")
+        for ranked in result.results:
+            print(
+                f"  rerank={ranked.relevance_score:.3f} "
+                f"cosine={ranked.similarity:.3f}  {ranked.document}"
+            )
@@ -0,0 +1,14 @@
+from dots_ocr import merge_tile_texts, overlap_lines
+
+
+def test_overlap_lines_scale_with_dpi():
+    assert overlap_lines(224, 100) > overlap_lines(224, 200) > overlap_lines(224, 300)
+
+
+def test_merge_tile_texts_only_drops_band_lines():
+    above = "\n".join(f"body line {i}" for i in range(20))
+    below = "body line 19\nnew line a\nnew line b\nbody line 3"
+
+    merged = merge_tile_texts([(0, 0, above), (1, 0, below)], band_lines=2)
+
+    assert merged.split("\n\n")[1] == "new line a\nnew line b\nbody line 3"
@@ -0,0 +1,22 @@
+import numpy as np
+
+import embeddings_api
+from utils.embedding_cache import EmbeddingCache
+
+
+def test_encode_batch_sends_repeated_misses_once(monkeypatch, tmp_path):
+    sent = []
+
+    def embed_batch(batch, model_id, encoding_format, dtype):
+        sent.extend(batch)
+        return np.array([[len(text), 1.0] for text in batch], dtype=dtype)
+
+    monkeypatch.setattr(embeddings_api, "get_model_id", lambda **kwargs: "model")
+    monkeypatch.setattr(embeddings_api, "_embed_batch", embed_batch)
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    texts = [f"text {i % 7}" * (i % 7 + 1) for i in range(30)]
+
+    matrix = embeddings_api.encode_batch(texts, cache=cache)
+
+    assert sorted(sent) == sorted(set(texts))
+    assert matrix[:, 0].tolist() == [len(text) for text in texts]
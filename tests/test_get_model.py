@@ -0,0 +1,51 @@
+import json
+import time
+from types import SimpleNamespace
+
+from utils import get_model
+
+
+class _Models:
+    def __init__(self):
+        self.calls = 0
+
+    def list(self):
+        self.calls += 1
+        return SimpleNamespace(data=[SimpleNamespace(id="served-model")])
+
+
+def _patch_client(monkeypatch):
+    models = _Models()
+    monkeypatch.setattr(
+        get_model,
+        "get_openai_client",
+        lambda **kwargs: SimpleNamespace(models=models),
+    )
+    get_model.clear_model_id_cache()
+    return models
+
+
+def test_unwritable_cache_file(monkeypatch, tmp_path):
+    models = _patch_client(monkeypatch)
+    cache_file = str(tmp_path / "missing-dir" / "ids.json")
+    assert get_model.get_model_id("key", "http://x/v1", cache_file=cache_file)
+    assert models.calls == 1
+
+
+def test_disk_entry_keeps_its_age(monkeypatch, tmp_path):
+    models = _patch_client(monkeypatch)
+    cache_file = tmp_path / "ids.json"
+    disk_key = get_model._disk_key("key", "http://x/v1")
+    resolved_at = time.time() - 250
+    cache_file.write_text(
+        json.dumps({disk_key: {"id": "disk-model", "resolved_at": resolved_at}})
+    )
+
+    model_id = get_model.get_model_id(
+        "key", "http://x/v1", ttl=300, cache_file=str(cache_file)
+    )
+
+    assert model_id == "disk-model"
+    _, stamp = get_model._cache[("http://x/v1", "key")]
+    assert time.monotonic() - stamp >= 250
+    assert models.calls == 0
@@ -0,0 +1,30 @@
+import fitz  # type: ignore
+
+from utils.dots_ocr_utils import prefilter_pdf_pages
+
+
+def _invoice(doc, number):
+    page = doc.new_page()
+    page.insert_text((72, 72), "ACME Corp Invoice", fontsize=24)
+    for i in range(20):
+        page.insert_text((72, 120 + i * 20), f"Line item {i}  qty 1", fontsize=11)
+    page.insert_text((400, 72), f"No. {number}", fontsize=11)
+
+
+def test_prefilter_pdf_pages(tmp_path):
+    doc = fitz.open()
+    _invoice(doc, 1001)
+    _invoice(doc, 1002)
+    doc.new_page()
+    doc.new_page().insert_text((72, 400), "One short sentence.", fontsize=9)
+    dark = doc.new_page()
+    dark.draw_rect(dark.rect, color=(0, 0, 0), fill=(0, 0, 0))
+    dark.insert_text((72, 400), "White on black", fontsize=14, color=(1, 1, 1))
+    _invoice(doc, 1001)
+    pdf_file = tmp_path / "pages.pdf"
+    doc.save(pdf_file)
+
+    pages = prefilter_pdf_pages(str(pdf_file))
+
+    assert [page.blank for page in pages] == [False, False, True, False, False, False]
+    assert [page.duplicate_of for page in pages] == [None, None, None, None, None, 0]
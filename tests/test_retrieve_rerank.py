@@ -0,0 +1,37 @@
+import numpy as np
+
+import embeddings_api
+import retrieve_rerank
+from retrieve_rerank import RetrieveRerankPipeline
+from utils.vector_index import VectorIndex
+
+DIM = 4
+
+
+def _fake_embed_batch(batch, model_id, encoding_format, dtype):
+    return np.ones((len(batch), DIM), dtype=dtype)
+
+
+def test_encode_batch_empty(monkeypatch):
+    monkeypatch.setattr(embeddings_api, "get_model_id", lambda **kwargs: "model")
+    monkeypatch.setattr(embeddings_api, "_embed_batch", _fake_embed_batch)
+    assert embeddings_api.encode_batch([]).shape == (0, DIM)
+
+
+def test_query_empty_collection(monkeypatch):
+    def rerank_documents(query, documents):
+        raise AssertionError("nothing to rerank")
+
+    monkeypatch.setattr(
+        retrieve_rerank,
+        "encode_batch",
+        lambda texts, cache=None: np.ones((len(texts), DIM), dtype=np.float32),
+    )
+    monkeypatch.setattr(retrieve_rerank, "rerank_documents", rerank_documents)
+    for pipeline in [
+        RetrieveRerankPipeline([]),
+        RetrieveRerankPipeline([], index=VectorIndex(np.empty((0, DIM)))),
+    ]:
+        result = pipeline.query("anything")
+        assert result.results == []
+        assert "rerank" in result.timings_ms
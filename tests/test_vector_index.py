@@ -0,0 +1,22 @@
+import numpy as np
+import pytest
+
+from utils.vector_index import VectorIndex
+
+
+@pytest.mark.parametrize("quantize", [False, True])
+def test_search_empty_index_or_k(quantize):
+    queries = np.ones((3, 4), dtype=np.float32)
+    for index, k in [
+        (VectorIndex(np.empty((0, 4)), quantize=quantize), 5),
+        (VectorIndex(np.eye(4), quantize=quantize), 0),
+    ]:
+        scores, ids = index.search(queries, k=k)
+        assert scores.shape == ids.shape == (3, 0)
+
+
+def test_search_top_k():
+    index = VectorIndex(np.eye(4))
+    scores, ids = index.search(np.array([0.1, 0.0, 1.0, 0.2]), k=2)
+    assert ids.tolist() == [[2, 3]]
+    assert scores[0, 0] > scores[0, 1]
@@ -0,0 +1,291 @@
+"""Client-side audio helpers for the Whisper examples.
+
+- Decode any audio file to 16 kHz mono PCM with the `ffmpeg` CLI.
+- Find silent stretches with a simple frame-energy detector.
+- Pick chunk boundaries inside silences, so long recordings can be split
+  without cutting words.
+- Write PCM back to WAV with the standard library.
+- Read a file's duration with `ffprobe`.
+- Preprocess a recording before upload: 16 kHz mono, leading/trailing and
+  long internal silences trimmed, re-encoded as low-bitrate Opus.
+
+Dependencies: NumPy and the `ffmpeg`/`ffprobe` executables on `PATH`.
+
+Example:
+    from utils.audio_utils import decode_audio, split_on_silence
+
+    samples = decode_audio("meeting.mp3")
+    for start, end in split_on_silence(samples, chunk_seconds=60):
+        chunk = samples[start:end]
+"""
+
+import os
+import shutil
+import subprocess
+import wave
+from dataclasses import dataclass
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30
+# Frames quieter than this (dB relative to full scale) count as silence.
+SILENCE_THRESHOLD_DB = -40.0
+MIN_SILENCE_SECONDS = 0.3
+# Preprocessing: internal silences at least this long are shortened to
+# KEEP_SILENCE_SECONDS, which keeps sentence boundaries audible to Whisper.
+LONG_SILENCE_SECONDS = 1.0
+KEEP_SILENCE_SECONDS = 0.3
+OPUS_BITRATE = "24k"
+
+
+@dataclass
+class PreprocessReport:
+    original_bytes: int
+    output_bytes: int
+    original_seconds: float
+    output_seconds: float
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.original_bytes - self.output_bytes
+
+    @property
+    def seconds_removed(self) -> float:
+        return self.original_seconds - self.output_seconds
+
+
+def _require(executable: str) -> None:
+    if shutil.which(executable) is None:
+        raise RuntimeError(
+            f"{executable} is required for audio processing, install it first"
+        )
+
+
+def decode_audio(path: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode `path` to mono int16 PCM at `sample_rate` using ffmpeg.
+
+    Raises:
+        RuntimeError: If ffmpeg is not installed or fails to decode the file.
+    """
+    _require("ffmpeg")
+    command = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-i",
+        path,
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+        "-",
+    ]
+    result = subprocess.run(command, capture_output=True, check=False)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed on {path}: {result.stderr.decode()}")
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def audio_duration(path: str) -> float | None:
+    """Return the duration of `path` in seconds, or `None` if unknown."""
+    if shutil.which("ffprobe") is None:
+        return None
+    command = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-show_entries",
+        "format=duration",
+        "-of",
+        "default=noprint_wrappers=1:nokey=1",
+        path,
+    ]
+    result = subprocess.run(command, capture_output=True, text=True, check=False)
+    try:
+        return float(result.stdout.strip())
+    except ValueError:
+        return None
+
+
+def frame_energy_db(
+    samples: np.ndarray, sample_rate: int = SAMPLE_RATE, frame_ms: int = FRAME_MS
+) -> np.ndarray:
+    """Return the RMS level of each `frame_ms` frame in dBFS."""
+    frame = sample_rate * frame_ms // 1000
+    frames = len(samples) // frame
+    if frames == 0:
+        return np.empty(0, dtype=np.float32)
+    blocks = samples[: frames * frame].reshape(frames, frame).astype(np.float32)
+    rms = np.sqrt(np.mean(blocks**2, axis=1)) / 32768.0
+    return (20 * np.log10(np.maximum(rms, 1e-10))).astype(np.float32)
+
+
+def find_silences(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    threshold_db: float = SILENCE_THRESHOLD_DB,
+    min_silence_seconds: float = MIN_SILENCE_SECONDS,
+    frame_ms: int = FRAME_MS,
+) -> list[tuple[int, int]]:
+    """Return `(start, end)` sample ranges of silences of at least the minimum length."""
+    silent = frame_energy_db(samples, sample_rate, frame_ms) < threshold_db
+    frame = sample_rate * frame_ms // 1000
+    min_frames = max(1, int(min_silence_seconds * 1000 / frame_ms))
+
+    # Edges of runs of silent frames.
+    padded = np.concatenate([[False], silent, [False]])
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    silences = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        if end - start >= min_frames:
+            silences.append((int(start * frame), min(int(end * frame), len(samples))))
+    return silences
+
+
+def split_on_silence(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    chunk_seconds: float = 60.0,
+    max_chunk_seconds: float | None = None,
+    **silence_kwargs,
+) -> list[tuple[int, int]]:
+    """Split `samples` into chunks of about `chunk_seconds`, cut in silences.
+
+    Each cut is placed in the middle of the silence closest to the target
+    length. If no silence lies before `max_chunk_seconds` (default 1.5x the
+    target) the chunk is cut hard at that length.
+
+    Returns:
+        list[tuple[int, int]]: Contiguous `(start, end)` sample ranges that
+        cover the whole input.
+    """
+    max_chunk_seconds = max_chunk_seconds or chunk_seconds * 1.5
+    target = int(chunk_seconds * sample_rate)
+    limit = int(max_chunk_seconds * sample_rate)
+    silences = find_silences(samples, sample_rate, **silence_kwargs)
+    cut_points = [(start + end) // 2 for start, end in silences]
+
+    chunks = []
+    start = 0
+    while len(samples) - start > limit:
+        candidates = [p for p in cut_points if start < p <= start + limit]
+        if candidates:
+            cut = min(candidates, key=lambda p: abs(p - start - target))
+        else:
+            cut = start + limit
+        chunks.append((start, cut))
+        start = cut
+    if start < len(samples):
+        chunks.append((start, len(samples)))
+    return chunks
+
+
+def trim_silence(
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    long_silence_seconds: float = LONG_SILENCE_SECONDS,
+    keep_silence_seconds: float = KEEP_SILENCE_SECONDS,
+    **silence_kwargs,
+) -> np.ndarray:
+    """Drop leading/trailing silence and shorten long internal silences.
+
+    Leading and trailing silences are reduced to `keep_silence_seconds`,
+    internal silences of at least `long_silence_seconds` are shortened to
+    `keep_silence_seconds` (half kept on each side).
+    """
+    keep = int(keep_silence_seconds * sample_rate)
+    # find_silences never covers the last partial frame, so a silence that
+    # reaches into it is trailing.
+    frame = sample_rate * silence_kwargs.get("frame_ms", FRAME_MS) // 1000
+    silences = find_silences(
+        samples,
+        sample_rate,
+        min_silence_seconds=min(long_silence_seconds, keep_silence_seconds),
+        **silence_kwargs,
+    )
+    cuts = []
+    for start, end in silences:
+        if start == 0:
+            cuts.append((0, max(0, end - keep)))
+        elif len(samples) - end < frame:
+            cuts.append((min(len(samples), start + keep), len(samples)))
+        elif end - start >= long_silence_seconds * sample_rate:
+            cuts.append((start + keep // 2, end - keep // 2))
+
+    kept, position = [], 0
+    for start, end in cuts:
+        kept.append(samples[position:start])
+        position = end
+    kept.append(samples[position:])
+    return np.concatenate(kept)
+
+
+def encode_opus(
+    path: str,
+    samples: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    bitrate: str = OPUS_BITRATE,
+) -> None:
+    """Encode mono int16 `samples` to an Ogg/Opus file with ffmpeg."""
+    _require("ffmpeg")
+    command = [
+        "ffmpeg",
+        "-nostdin",
+        "-loglevel",
+        "error",
+        "-y",
+        "-f",
+        "s16le",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+        "-i",
+        "-",
+        "-c:a",
+        "libopus",
+        "-b:a",
+        bitrate,
+        "-application",
+        "voip",
+        path,
+    ]
+    result = subprocess.run(
+        command,
+        input=np.ascontiguousarray(samples).tobytes(),
+        capture_output=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to encode {path}: {result.stderr.decode()}")
+
+
+def preprocess_audio(path: str, output_path: str, **trim_kwargs) -> PreprocessReport:
+    """Normalize, trim and compactly re-encode `path` for upload.
+
+    The audio is decoded to 16 kHz mono, silences are trimmed with
+    `trim_silence()` and the result is written to `output_path` as Opus.
+    Timestamps in the transcription refer to the trimmed audio.
+    """
+    samples = decode_audio(path)
+    trimmed = trim_silence(samples, **trim_kwargs)
+    encode_opus(output_path, trimmed)
+    return PreprocessReport(
+        original_bytes=os.path.getsize(path),
+        output_bytes=os.path.getsize(output_path),
+        original_seconds=len(samples) / SAMPLE_RATE,
+        output_seconds=len(trimmed) / SAMPLE_RATE,
+    )
+
+
+def write_wav(path: str, samples: np.ndarray, sample_rate: int = SAMPLE_RATE) -> None:
+    """Write mono int16 `samples` to a WAV file."""
+    with wave.open(path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(np.ascontiguousarray(samples, dtype=np.int16).tobytes())
@@ -0,0 +1,229 @@
+"""Shared, pooled HTTP and OpenAI clients.
+
+Every example script talks to a handful of long-lived endpoints (vLLM,
+embeddings, reranker, Docling, Whisper). Creating a new `OpenAI(...)` or
+`httpx.Client(...)` per call throws away the TCP/TLS connection each time,
+so this module keeps one connection pool per endpoint for the lifetime of
+the process and hands it out to every caller:
+
+- `get_http_client()` / `get_async_http_client()`: raw `httpx` clients with
+  keep-alive pools, one per `scheme://host:port`.
+- `get_openai_client()` / `get_async_openai_client()`: OpenAI SDK clients
+  that reuse the same pools, one per (base_url, api_key).
+- `configure_endpoint()`: per-endpoint pool limits and timeout. Must be
+  called before the first client for that endpoint is created.
+- `auth_headers()`: Bearer header for raw requests. The pools are shared
+  between API keys, so credentials are passed per request, never stored on
+  the client.
+
+HTTP/2 is negotiated automatically when the optional `h2` package is
+installed (`httpx[http2]`); otherwise the pools fall back to HTTP/1.1
+keep-alive.
+
+Clients are created lazily, so `truststore.inject_into_ssl()` in the calling
+script still applies to them. All clients are closed at interpreter exit.
+
+Example:
+    from utils.clients import get_openai_client
+
+    client = get_openai_client(base_url="http://localhost:8000/v1", api_key="0")
+    client.embeddings.create(input=["hello"], model="my-model")
+"""
+
+import asyncio
+import atexit
+import os
+import threading
+import weakref
+from dataclasses import dataclass, replace
+from urllib.parse import urlsplit
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+try:
+    import h2  # type: ignore # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+DEFAULT_TIMEOUT = 600.0
+DEFAULT_MAX_CONNECTIONS = 64
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 32
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+
+@dataclass(frozen=True)
+class EndpointConfig:
+    """Connection pool settings for one `scheme://host:port` endpoint."""
+
+    max_connections: int = DEFAULT_MAX_CONNECTIONS
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS
+    keepalive_expiry: float = DEFAULT_KEEPALIVE_EXPIRY
+    timeout: float = DEFAULT_TIMEOUT
+    http2: bool = True
+
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+
+_lock = threading.Lock()
+_endpoint_configs: dict[str, EndpointConfig] = {}
+_http_clients: dict[str, httpx.Client] = {}
+_openai_clients: dict[tuple[str, str], OpenAI] = {}
+# Async clients per event loop. Keyed on the loop object itself (not its id,
+# which is reused once a loop is garbage collected), and dropped with it.
+_async_http_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[str, httpx.AsyncClient]
+] = weakref.WeakKeyDictionary()
+_async_openai_clients: weakref.WeakKeyDictionary[
+    asyncio.AbstractEventLoop, dict[tuple[str, str], AsyncOpenAI]
+] = weakref.WeakKeyDictionary()
+
+
+def endpoint_key(url: str) -> str:
+    """Return the `scheme://host:port` part of `url` used to key the pools."""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    return f"{parts.scheme}://{parts.hostname}:{port}"
+
+
+def configure_endpoint(url: str, **settings) -> EndpointConfig:
+    """Override the pool settings for the endpoint serving `url`.
+
+    Args:
+        url: Any URL on the endpoint (path is ignored).
+        **settings: Fields of `EndpointConfig` to override, e.g.
+            `max_connections=8` or `timeout=30.0`.
+
+    Returns:
+        EndpointConfig: The effective settings for the endpoint.
+
+    Raises:
+        RuntimeError: If a client for the endpoint already exists.
+    """
+    key = endpoint_key(url)
+    with _lock:
+        if key in _http_clients or any(
+            key in clients for clients in _async_http_clients.values()
+        ):
+            raise RuntimeError(
+                f"clients for {key} already exist, configure the endpoint first"
+            )
+        config = replace(_endpoint_configs.get(key, EndpointConfig()), **settings)
+        _endpoint_configs[key] = config
+    return config
+
+
+def auth_headers(api_key: str) -> dict[str, str]:
+    """Return the Bearer authorization header for `api_key`."""
+    return {"Authorization": f"Bearer {api_key}"}
+
+
+def _client_kwargs(key: str) -> dict:
+    config = _endpoint_configs.get(key, EndpointConfig())
+    return {
+        "limits": config.limits(),
+        "timeout": httpx.Timeout(config.timeout, connect=10.0),
+        "http2": config.http2 and HTTP2_AVAILABLE,
+        "follow_redirects": True,
+    }
+
+
+def get_http_client(url: str) -> httpx.Client:
+    """Return the shared synchronous `httpx.Client` for the endpoint of `url`.
+
+    The client has no `base_url`, pass absolute URLs to it.
+    """
+    key = endpoint_key(url)
+    with _lock:
+        client = _http_clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.Client(**_client_kwargs(key))
+            _http_clients[key] = client
+    return client
+
+
+def get_async_http_client(url: str) -> httpx.AsyncClient:
+    """Return the shared `httpx.AsyncClient` for the endpoint of `url`.
+
+    Async connections belong to an event loop, so one pool is kept per
+    (endpoint, running loop). Must be called from inside a coroutine.
+    """
+    key = endpoint_key(url)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_http_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**_client_kwargs(key))
+            clients[key] = client
+    return client
+
+
+def _resolve_base_url(base_url: str | None) -> str:
+    # Same fallback as the OpenAI SDK, so `api_url` may be unset in `.env`.
+    return base_url or os.environ.get("OPENAI_BASE_URL") or "https://api.openai.com/v1"
+
+
+def get_openai_client(base_url: str | None, api_key: str) -> OpenAI:
+    """Return a shared `OpenAI` client backed by the endpoint's pool."""
+    base_url = _resolve_base_url(base_url)
+    key = (base_url, api_key)
+    with _lock:
+        client = _openai_clients.get(key)
+    if client is None:
+        client = OpenAI(
+            api_key=api_key, base_url=base_url, http_client=get_http_client(base_url)
+        )
+        with _lock:
+            client = _openai_clients.setdefault(key, client)
+    return client
+
+
+def get_async_openai_client(base_url: str | None, api_key: str) -> AsyncOpenAI:
+    """Return a shared `AsyncOpenAI` client for the running event loop."""
+    base_url = _resolve_base_url(base_url)
+    key = (base_url, api_key)
+    loop = asyncio.get_running_loop()
+    with _lock:
+        client = _async_openai_clients.get(loop, {}).get(key)
+    if client is None:
+        client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=get_async_http_client(base_url),
+        )
+        with _lock:
+            client = _async_openai_clients.setdefault(loop, {}).setdefault(key, client)
+    return client
+
+
+async def aclose_clients() -> None:
+    """Close the async clients that belong to the running event loop.
+
+    Call this at the end of the coroutine passed to `asyncio.run()`, since
+    async pools cannot be closed once their loop is gone.
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_http_clients.pop(loop, {}).values()
+        _async_openai_clients.pop(loop, None)
+    for client in clients:
+        await client.aclose()
+
+
+@atexit.register
+def close_clients() -> None:
+    """Close all synchronous pools. Registered to run at interpreter exit."""
+    with _lock:
+        clients = list(_http_clients.values())
+        _http_clients.clear()
+        _openai_clients.clear()
+    for client in clients:
+        client.close()
@@ -4,12 +4,30 @@ This module provides helpers used by Dots OCR flows:
 
 - Render a single `fitz.Page` (PyMuPDF) to a `PIL.Image` at a target DPI,
   with an automatic fallback to PyMuPDF's default DPI for very large pages.
-- Load all or a range of pages from a PDF file into `PIL.Image` objects.
+  With `fit_model=True` the final `smart_resize` size is computed from
+  `page.rect` up front and the page is rasterized once at exactly that size.
+- Load all or a range of pages from a PDF file into `PIL.Image` objects, or
+  stream them lazily with bounded look-ahead via `iter_images_from_pdf`.
+- Classify PDF pages by their text layer (`classify_pdf_page`) and extract
+  the text of born-digital pages locally (`split_pages_by_text_layer`), so
+  only scanned or image-heavy pages need OCR.
+- Pre-filter pages before OCR (`prefilter_pdf_pages`): blank pages are
+  detected by ink on a cheap low-resolution grayscale render, confirmed at a
+  higher DPI, and duplicates by a difference hash confirmed by a
+  shift-tolerant comparison of the ink at that DPI.
+- Split oversized pages (more than `MAX_PIXELS` at the render DPI) into
+  overlapping tiles (`iter_page_tiles`, `crop_image_tiles`), so small text
+  stays readable instead of being downscaled by `smart_resize`.
+- Rasterize PDF pages on a process pool (`render_pdf_pages_parallel`), each
+  worker opening the PDF itself and returning encoded PNG/JPEG bytes.
 - Resize images to satisfy model-friendly constraints via `smart_resize`:
   dimensions divisible by a factor (default 28), total pixels within a
   configurable range, while keeping the aspect ratio close to the original.
 - Small math helpers to round/ceil/floor by a factor.
-- Convert a `PIL.Image` to a `data:image/...;base64,` string for transport.
+- Convert a `PIL.Image` to a `data:image/...;base64,` string for transport,
+  as PNG (configurable compression level), JPEG or WebP (configurable
+  quality). `image_file_to_base64` sends an image file's original bytes when
+  it needs no resizing.
 
 Key constants:
 - MIN_PIXELS, MAX_PIXELS: Inclusive bounds for total pixels when resizing.
@@ -28,41 +46,474 @@ Example:
 """
 
 import base64
+import functools
 import math
+import os
+import queue
+import threading
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
 from io import BytesIO
 
 import fitz  # type: ignore
-from PIL import Image
+from PIL import Image, ImageChops, ImageFilter
 
 MIN_PIXELS = 3136
 MAX_PIXELS = 11289600
 IMAGE_FACTOR = 28
-
-
-def fitz_doc_to_image(doc, target_dpi=200, origin_dpi=None) -> Image.Image:
+DEFAULT_QUALITY = 90
+
+# Text-layer classification: a page is born-digital if it has at least
+# MIN_TEXT_CHARS extractable characters, text blocks cover at least
+# MIN_TEXT_COVERAGE of it and more of it than images do, images cover less
+# than MAX_IMAGE_COVERAGE and few characters are unmappable.
+MIN_TEXT_CHARS = 50
+MIN_TEXT_COVERAGE = 0.05
+MAX_IMAGE_COVERAGE = 0.5
+MAX_UNMAPPED_RATIO = 0.05
+# Invisible text layers added by OCR tools (e.g. Tesseract) use this font.
+OCR_LAYER_FONTS = ("GlyphLessFont",)
+
+# Blank/duplicate pre-filter. Pages are rendered in grayscale at
+# PREFILTER_DPI; pixels that differ by at least INK_CONTRAST from the paper
+# (the median gray level, so tinted scans and light text on dark pages work
+# too) count as ink. A page with less than MAX_BLANK_INK_COVERAGE ink is
+# only a blank candidate: it is re-rendered at CHECK_DPI, where a line of
+# small print is hundreds of pixels, and dropped if at most
+# MAX_BLANK_INK_PIXELS remain (specks of scanner dust).
+# Pages whose difference hashes differ in at most MAX_HASH_DISTANCE bits are
+# duplicate candidates; the MAX_DUPLICATE_CANDIDATES closest are compared at
+# CHECK_DPI, where text is legible. Their ink masks are aligned with shifts
+# of up to MAX_DUPLICATE_SHIFT pixels (scanner misregistration), and ink
+# more than one pixel away from any ink of the other page is counted. At
+# most MAX_DUPLICATE_DIFF_PIXELS such pixels are allowed: separate scans of
+# one sheet have none, a single changed digit of an invoice number ~15.
+PREFILTER_DPI = 36
+INK_CONTRAST = 40
+MAX_BLANK_INK_COVERAGE = 0.002
+CHECK_DPI = 100
+MAX_BLANK_INK_PIXELS = 50
+HASH_SIZE = 16
+MAX_HASH_DISTANCE = 6
+MAX_DUPLICATE_CANDIDATES = 4
+MAX_DUPLICATE_SHIFT = 3
+MAX_DUPLICATE_DIFF_PIXELS = 4
+
+# Tiling of oversized pages: tiles of at most TILE_SIZE x TILE_SIZE pixels (a
+# multiple of IMAGE_FACTOR, ~3.2 MP, well below MAX_PIXELS; tiles at the
+# right and bottom edge are cut off) overlapping by TILE_OVERLAP pixels,
+# enough to contain a full text line at 200 DPI.
+TILE_SIZE = 1792
+TILE_OVERLAP = 224
+
+# Magic bytes of the formats that can be sent to the model as-is.
+_IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "png",
+    b"\xff\xd8\xff": "jpeg",
+}
+
+
+def fitz_doc_to_image(
+    doc, target_dpi=200, origin_dpi=None, fit_model=False
+) -> Image.Image:
     """Render a `fitz.Page` to a `PIL.Image`.
 
     Args:
         doc: A PyMuPDF page (e.g., `fitz.Page`).
         target_dpi: Desired render DPI. Defaults to 200.
         origin_dpi: Unused. Kept for backward compatibility.
+        fit_model: Render directly at the `smart_resize` size of the page, so
+            the image needs no further resizing. Defaults to False.
 
     Returns:
         PIL.Image: The rendered page as an RGB image.
     """
+    pm = _render_pixmap(doc, target_dpi, fit_model)
+    image = Image.frombytes("RGB", (pm.width, pm.height), pm.samples)
+    if fit_model:
+        # Guard against off-by-one pixmap rounding on unusual page boxes.
+        height, width = page_target_size(doc, target_dpi)
+        if image.size != (width, height):
+            image = image.resize((width, height))
+    return image
+
+
+def page_target_size(
+    page,
+    target_dpi=200,
+    factor: int = IMAGE_FACTOR,
+    min_pixels: int = MIN_PIXELS,
+    max_pixels: int = MAX_PIXELS,
+) -> tuple[int, int]:
+    """Return the `(height, width)` a page ends up with after `smart_resize`.
+
+    Computed from `page.rect` only, without rendering. Pages larger than
+    4500px at `target_dpi` fall back to 72 DPI like `fitz_doc_to_image`.
+    """
+    scale = target_dpi / 72
+    if max(page.rect.width, page.rect.height) * scale > 4500:
+        scale = 1.0
+    height = max(1, round(page.rect.height * scale))
+    width = max(1, round(page.rect.width * scale))
+    return smart_resize(height, width, factor, min_pixels, max_pixels)
+
+
+def _render_pixmap(page, target_dpi, fit_model=False):
+    if fit_model:
+        # One render at exactly the model's input size instead of rendering
+        # at the DPI and resampling afterwards.
+        height, width = page_target_size(page, target_dpi)
+        mat = fitz.Matrix(width / page.rect.width, height / page.rect.height)
+        return page.get_pixmap(matrix=mat, alpha=False)
+
     mat = fitz.Matrix(target_dpi / 72, target_dpi / 72)
-    pm = doc.get_pixmap(matrix=mat, alpha=False)
+    pm = page.get_pixmap(matrix=mat, alpha=False)
 
     if pm.width > 4500 or pm.height > 4500:
         mat = fitz.Matrix(72 / 72, 72 / 72)  # use fitz default dpi
-        pm = doc.get_pixmap(matrix=mat, alpha=False)
+        pm = page.get_pixmap(matrix=mat, alpha=False)
+    return pm
 
-    image = Image.frombytes("RGB", (pm.width, pm.height), pm.samples)
-    return image
+
+def _tile_starts(length: int, tile_size: int, overlap: int) -> list[int]:
+    starts = [0]
+    # The last tile is cut off at the edge rather than shifted back, so
+    # neighbouring tiles always overlap by exactly `overlap` pixels.
+    while starts[-1] + tile_size < length:
+        starts.append(starts[-1] + tile_size - overlap)
+    return starts
+
+
+def tile_boxes(
+    width: int, height: int, tile_size: int = TILE_SIZE, overlap: int = TILE_OVERLAP
+) -> list[tuple[int, int, tuple[int, int, int, int]]]:
+    """Cover a `width` x `height` image with overlapping tiles.
+
+    Returns:
+        list[tuple[int, int, tuple[int, int, int, int]]]: `(row, col, box)`
+        in row-major order, with `box = (x1, y1, x2, y2)` in pixels.
+    """
+    return [
+        (row, col, (x, y, min(x + tile_size, width), min(y + tile_size, height)))
+        for row, y in enumerate(_tile_starts(height, tile_size, overlap))
+        for col, x in enumerate(_tile_starts(width, tile_size, overlap))
+    ]
+
+
+def page_needs_tiling(page, target_dpi=200, max_pixels: int = MAX_PIXELS) -> bool:
+    """Return True if `page` at `target_dpi` has more than `max_pixels`."""
+    scale = target_dpi / 72
+    return page.rect.width * scale * page.rect.height * scale > max_pixels
+
+
+def iter_page_tiles(
+    page, target_dpi=200, tile_size: int = TILE_SIZE, overlap: int = TILE_OVERLAP
+) -> Iterator[tuple[int, int, Image.Image]]:
+    """Lazily render a `fitz.Page` at full `target_dpi` as overlapping tiles.
+
+    Each tile is rasterized on its own with a clip rectangle when the
+    consumer asks for it, so only the tiles being processed are in memory
+    and no 4500px fallback to 72 DPI applies.
+
+    Yields:
+        tuple[int, int, PIL.Image]: `(row, col, tile)` in row-major order.
+    """
+    scale = target_dpi / 72
+    width = round(page.rect.width * scale)
+    height = round(page.rect.height * scale)
+    for row, col, (x1, y1, x2, y2) in tile_boxes(width, height, tile_size, overlap):
+        clip = fitz.Rect(x1, y1, x2, y2) / scale
+        pm = page.get_pixmap(matrix=fitz.Matrix(scale, scale), clip=clip, alpha=False)
+        yield row, col, Image.frombytes("RGB", (pm.width, pm.height), pm.samples)
+
+
+def split_oversized_pages(
+    pdf_file: str,
+    start_page_id=0,
+    end_page_id=None,
+    page_ids: list[int] | None = None,
+    dpi=200,
+) -> tuple[list[int], list[int]]:
+    """Return `(regular_page_ids, oversized_page_ids)` for a page selection."""
+    regular, oversized = [], []
+    with fitz.open(pdf_file) as doc:
+        for index in _select_pages(doc, start_page_id, end_page_id, page_ids):
+            (oversized if page_needs_tiling(doc[index], dpi) else regular).append(index)
+    return regular, oversized
+
+
+def iter_pdf_page_tiles(
+    pdf_file: str, page_id: int, dpi=200, **tile_kwargs
+) -> Iterator[tuple[int, int, Image.Image]]:
+    """Open `pdf_file` and run `iter_page_tiles` on one page."""
+    with fitz.open(pdf_file) as doc:
+        yield from iter_page_tiles(doc[page_id], dpi, **tile_kwargs)
+
+
+def crop_image_tiles(
+    image: Image.Image, tile_size: int = TILE_SIZE, overlap: int = TILE_OVERLAP
+) -> list[tuple[int, int, Image.Image]]:
+    """Cut an image into overlapping tiles, `(row, col, tile)` in row-major order."""
+    return [
+        (row, col, image.crop(box))
+        for row, col, box in tile_boxes(image.width, image.height, tile_size, overlap)
+    ]
+
+
+@dataclass
+class PageClassification:
+    index: int
+    text_chars: int
+    text_coverage: float  # fraction of the page covered by text blocks
+    image_coverage: float  # fraction of the page covered by images
+    unmapped_ratio: float  # fraction of characters without a Unicode mapping
+    ocr_layer: bool  # text comes from an earlier OCR pass (GlyphLessFont)
+
+    @property
+    def born_digital(self) -> bool:
+        return (
+            self.text_chars >= MIN_TEXT_CHARS
+            and self.text_coverage >= MIN_TEXT_COVERAGE
+            and self.image_coverage < MAX_IMAGE_COVERAGE
+            and self.image_coverage <= self.text_coverage
+            and self.unmapped_ratio <= MAX_UNMAPPED_RATIO
+            and not self.ocr_layer
+        )
+
+
+def _covered_fraction(rects, page_rect) -> float:
+    page_area = abs(page_rect) or 1.0
+    area = sum(abs(fitz.Rect(rect) & page_rect) for rect in rects)
+    return min(1.0, area / page_area)
+
+
+def classify_pdf_page(page) -> PageClassification:
+    """Measure the text layer of a `fitz.Page` without rendering it.
+
+    Overlapping images or text blocks are counted twice, so coverages are
+    upper bounds.
+    """
+    blocks = [b for b in page.get_text("blocks") if b[6] == 0]
+    text = "".join(b[4] for b in blocks)
+    chars = sum(not c.isspace() for c in text)
+    fonts = [font[3] for font in page.get_fonts()]
+    return PageClassification(
+        index=page.number,
+        text_chars=chars,
+        text_coverage=_covered_fraction([b[:4] for b in blocks], page.rect),
+        image_coverage=_covered_fraction(
+            [info["bbox"] for info in page.get_image_info()], page.rect
+        ),
+        unmapped_ratio=text.count("\ufffd") / chars if chars else 0.0,
+        ocr_layer=any(name in font for font in fonts for name in OCR_LAYER_FONTS),
+    )
+
+
+def split_pages_by_text_layer(
+    pdf_file: str, start_page_id=0, end_page_id=None
+) -> tuple[dict[int, str], list[int]]:
+    """Extract born-digital pages locally and list the pages that need OCR.
+
+    Args:
+        pdf_file: Path to the PDF file on disk.
+        start_page_id: First page index (0-based) to include. Defaults to 0.
+        end_page_id: Last page index (0-based) to include (inclusive). If None,
+            defaults to the final page in the document.
+
+    Returns:
+        tuple[dict[int, str], list[int]]: The text of each born-digital page
+        by page index (from `get_text` in reading order), and the indices of
+        scanned or image-heavy pages.
+    """
+    texts, ocr_page_ids = {}, []
+    with fitz.open(pdf_file) as doc:
+        for index in _page_range(doc, start_page_id, end_page_id):
+            page = doc[index]
+            if classify_pdf_page(page).born_digital:
+                texts[index] = page.get_text("text", sort=True).strip()
+            else:
+                ocr_page_ids.append(index)
+    return texts, ocr_page_ids
+
+
+@dataclass
+class PagePrefilter:
+    index: int
+    ink_coverage: float
+    dhash: int
+    blank: bool = False
+    duplicate_of: int | None = None  # index of the first identical page
+
+
+def difference_hash(image: Image.Image, hash_size: int = HASH_SIZE) -> int:
+    """Return the `hash_size**2`-bit dHash of `image` (grayscale gradients)."""
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.BILINEAR)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            left, right = pixels[offset + col], pixels[offset + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def _paper_level(histogram: list[int], pixels: int) -> int:
+    paper, seen = 0, 0
+    while seen + histogram[paper] < pixels / 2:
+        seen += histogram[paper]
+        paper += 1
+    return paper
+
+
+def ink_pixels(gray: Image.Image, contrast: int = INK_CONTRAST) -> int:
+    """Return the number of pixels at least `contrast` away from the paper."""
+    histogram = gray.histogram()
+    paper = _paper_level(histogram, gray.width * gray.height)
+    return sum(histogram[: max(0, paper - contrast + 1)]) + sum(
+        histogram[paper + contrast :]
+    )
+
+
+def ink_coverage(gray: Image.Image, contrast: int = INK_CONTRAST) -> float:
+    """Return the fraction of pixels at least `contrast` away from the paper."""
+    return ink_pixels(gray, contrast) / (gray.width * gray.height)
+
+
+def _render_gray(page, dpi) -> Image.Image:
+    scale = dpi / 72
+    pm = page.get_pixmap(
+        matrix=fitz.Matrix(scale, scale), colorspace=fitz.csGRAY, alpha=False
+    )
+    return Image.frombytes("L", (pm.width, pm.height), pm.samples)
+
+
+def _ink_masks(gray: Image.Image, contrast: int = INK_CONTRAST):
+    """Return the ink mask of `gray` and the mask dilated by one pixel."""
+    paper = _paper_level(gray.histogram(), gray.width * gray.height)
+    mask = gray.point(lambda v: 255 if abs(v - paper) >= contrast else 0)
+    return mask, mask.filter(ImageFilter.MaxFilter(3))
+
+
+def _unmatched_ink_pixels(masks_a, masks_b, max_shift: int) -> int:
+    """Fewest ink pixels without ink nearby on the other page, over shifts.
+
+    Shifts step by two pixels, the one-pixel dilation covers the rest.
+    """
+    (a, dilated_a), (b, dilated_b) = masks_a, masks_b
+    width, height = a.size
+    shifts = sorted(range(-max_shift + 1, max_shift, 2), key=abs)
+    best = width * height
+    for dx in shifts:
+        for dy in shifts:
+            box_a = (max(dx, 0), max(dy, 0), width + min(dx, 0), height + min(dy, 0))
+            box_b = (
+                max(-dx, 0),
+                max(-dy, 0),
+                width + min(-dx, 0),
+                height + min(-dy, 0),
+            )
+            only_a = ImageChops.subtract(a.crop(box_a), dilated_b.crop(box_b))
+            only_b = ImageChops.subtract(b.crop(box_b), dilated_a.crop(box_a))
+            best = min(best, only_a.histogram()[255] + only_b.histogram()[255])
+            if best == 0:
+                return 0
+    return best
+
+
+def prefilter_pdf_pages(
+    pdf_file: str,
+    start_page_id=0,
+    end_page_id=None,
+    page_ids: list[int] | None = None,
+    dpi=PREFILTER_DPI,
+) -> list[PagePrefilter]:
+    """Find blank and duplicate pages before OCR.
+
+    Each page is rendered once in grayscale at `dpi` (a few milliseconds
+    per page). Pages with almost no ink there are re-rendered at `CHECK_DPI`
+    and marked `blank` only if no more than a few specks of ink remain.
+    Every other page is compared with the earlier unique pages of the
+    document: a close difference hash makes it a candidate, and it is marked
+    `duplicate_of` that page only if their ink matches at `CHECK_DPI`,
+    allowing for scanner noise and a small shift. Pages that merely share a
+    template (invoices, forms) are kept.
+
+    Args:
+        pdf_file: Path to the PDF file on disk.
+        start_page_id: First page index (0-based) to include. Defaults to 0.
+        end_page_id: Last page index (0-based) to include (inclusive). If None,
+            defaults to the final page in the document.
+        page_ids: Explicit page indices to check instead of the range.
+        dpi: Render DPI for the cheap checks. Defaults to 36.
+
+    Returns:
+        list[PagePrefilter]: One entry per checked page, in page order.
+    """
+    results = []
+    unique: list[PagePrefilter] = []
+    with fitz.open(pdf_file) as doc:
+
+        @functools.lru_cache(maxsize=MAX_DUPLICATE_CANDIDATES + 1)
+        def check_masks(page_index: int):
+            return _ink_masks(_render_gray(doc[page_index], CHECK_DPI))
+
+        def same_content(a: int, b: int) -> bool:
+            masks_a, masks_b = check_masks(a), check_masks(b)
+            return masks_a[0].size == masks_b[0].size and (
+                _unmatched_ink_pixels(masks_a, masks_b, MAX_DUPLICATE_SHIFT)
+                <= MAX_DUPLICATE_DIFF_PIXELS
+            )
+
+        for index in _select_pages(doc, start_page_id, end_page_id, page_ids):
+            gray = _render_gray(doc[index], dpi)
+            ink = ink_coverage(gray)
+            page = PagePrefilter(index, ink, difference_hash(gray))
+            results.append(page)
+            if (
+                ink < MAX_BLANK_INK_COVERAGE
+                and ink_pixels(_render_gray(doc[index], CHECK_DPI))
+                <= MAX_BLANK_INK_PIXELS
+            ):
+                page.blank = True
+                continue
+
+            distances = [
+                ((page.dhash ^ original.dhash).bit_count(), original.index)
+                for original in unique
+            ]
+            candidates = sorted(d for d in distances if d[0] <= MAX_HASH_DISTANCE)
+            for _, original in candidates[:MAX_DUPLICATE_CANDIDATES]:
+                if same_content(index, original):
+                    page.duplicate_of = original
+                    break
+            else:
+                unique.append(page)
+    return results
+
+
+def _page_range(doc, start_page_id, end_page_id) -> range:
+    pdf_page_num = doc.page_count
+    end_page_id = (
+        end_page_id
+        if end_page_id is not None and end_page_id >= 0
+        else pdf_page_num - 1
+    )
+    if end_page_id > pdf_page_num - 1:
+        print("end_page_id is out of range, use images length")
+        end_page_id = pdf_page_num - 1
+    return range(max(start_page_id, 0), end_page_id + 1)
+
+
+def _select_pages(doc, start_page_id, end_page_id, page_ids):
+    if page_ids is not None:
+        return page_ids
+    return _page_range(doc, start_page_id, end_page_id)
 
 
 def load_images_from_pdf(
-    pdf_file: str, dpi=200, start_page_id=0, end_page_id=None
+    pdf_file: str, dpi=200, start_page_id=0, end_page_id=None, fit_model=False
 ) -> list:
     """Load pages from a PDF file and render them to images.
 
@@ -72,30 +523,234 @@ def load_images_from_pdf(
         start_page_id: First page index (0-based) to include. Defaults to 0.
         end_page_id: Last page index (0-based) to include (inclusive). If None,
             defaults to the final page in the document.
+        fit_model: Render each page at its `smart_resize` size. Defaults to
+            False.
 
     Returns:
         list[PIL.Image]: A list of rendered RGB images in document order.
     """
     images = []
     with fitz.open(pdf_file) as doc:
-        pdf_page_num = doc.page_count
-        end_page_id = (
-            end_page_id
-            if end_page_id is not None and end_page_id >= 0
-            else pdf_page_num - 1
-        )
-        if end_page_id > pdf_page_num - 1:
-            print("end_page_id is out of range, use images length")
-            end_page_id = pdf_page_num - 1
-
-        for index in range(0, doc.page_count):
-            if start_page_id <= index <= end_page_id:
-                page = doc[index]
-                img = fitz_doc_to_image(page, target_dpi=dpi)
-                images.append(img)
+        for index in _page_range(doc, start_page_id, end_page_id):
+            images.append(fitz_doc_to_image(doc[index], dpi, fit_model=fit_model))
     return images
 
 
+def iter_images_from_pdf(
+    pdf_file: str,
+    dpi=200,
+    start_page_id=0,
+    end_page_id=None,
+    prefetch=2,
+    fit_model=False,
+    page_ids: list[int] | None = None,
+) -> Iterator[Image.Image]:
+    """Lazily render pages from a PDF file, one image at a time.
+
+    Only the requested pages are rendered. With `prefetch > 0` a background
+    thread renders up to `prefetch` pages ahead of the consumer, so rendering
+    overlaps with OCR while memory stays bounded. The PDF is opened and used
+    only by that thread, since PyMuPDF documents must not be shared across
+    threads.
+
+    Args:
+        pdf_file: Path to the PDF file on disk.
+        dpi: Target render DPI for each page. Defaults to 200.
+        start_page_id: First page index (0-based) to include. Defaults to 0.
+        end_page_id: Last page index (0-based) to include (inclusive). If None,
+            defaults to the final page in the document.
+        prefetch: Number of pages rendered ahead. 0 renders on demand in the
+            caller's thread. Defaults to 2.
+        fit_model: Render each page at its `smart_resize` size. Defaults to
+            False.
+        page_ids: Explicit page indices to render instead of the range.
+
+    Yields:
+        PIL.Image: Rendered RGB images in document order.
+    """
+    if prefetch <= 0:
+        with fitz.open(pdf_file) as doc:
+            for index in _select_pages(doc, start_page_id, end_page_id, page_ids):
+                yield fitz_doc_to_image(doc[index], dpi, fit_model=fit_model)
+        return
+
+    pages: queue.Queue = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    done = object()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def render():
+        try:
+            with fitz.open(pdf_file) as doc:
+                for index in _select_pages(doc, start_page_id, end_page_id, page_ids):
+                    image = fitz_doc_to_image(doc[index], dpi, fit_model=fit_model)
+                    if not put(image):
+                        return
+        except Exception as e:
+            put(e)
+            return
+        put(done)
+
+    worker = threading.Thread(target=render, daemon=True)
+    worker.start()
+    try:
+        while (item := pages.get()) is not done:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        worker.join()
+
+
+def _render_pages_to_bytes(
+    pdf_file: str,
+    page_ids: list[int],
+    dpi: int,
+    image_format: str,
+    jpg_quality: int,
+    fit_model: bool,
+) -> list[tuple[int, bytes]]:
+    """Process-pool worker: open the PDF and encode the given pages."""
+    rendered = []
+    with fitz.open(pdf_file) as doc:
+        for index in page_ids:
+            pm = _render_pixmap(doc[index], dpi, fit_model)
+            rendered.append((index, pm.tobytes(image_format, jpg_quality=jpg_quality)))
+    return rendered
+
+
+def render_pdf_pages_parallel(
+    pdf_file: str,
+    dpi=200,
+    start_page_id=0,
+    end_page_id=None,
+    workers=None,
+    pages_per_task=4,
+    image_format="png",
+    jpg_quality=90,
+    fit_model=False,
+    page_ids: list[int] | None = None,
+) -> Iterator[tuple[int, bytes]]:
+    """Rasterize PDF pages on a process pool and yield them in page order.
+
+    Pages are split into tasks of `pages_per_task` consecutive pages. Each
+    worker opens the PDF itself (PyMuPDF documents cannot be shared) and
+    returns the pages as encoded image bytes, which are much smaller to send
+    back than pickled images. At most `2 * workers` tasks are queued at once.
+
+    Args:
+        pdf_file: Path to the PDF file on disk.
+        dpi: Target render DPI for each page. Defaults to 200.
+        start_page_id: First page index (0-based) to include. Defaults to 0.
+        end_page_id: Last page index (0-based) to include (inclusive). If None,
+            defaults to the final page in the document.
+        workers: Number of processes. Defaults to `os.cpu_count()`.
+        pages_per_task: Consecutive pages rendered per task. Defaults to 4.
+        image_format: `"png"` or `"jpg"`. Defaults to `"png"`.
+        jpg_quality: JPEG quality when `image_format="jpg"`.
+        fit_model: Render each page at its `smart_resize` size. Defaults to
+            False.
+        page_ids: Explicit page indices to render instead of the range.
+
+    Yields:
+        tuple[int, bytes]: `(page_index, encoded_image)` in document order.
+    """
+    if page_ids is None:
+        with fitz.open(pdf_file) as doc:
+            page_ids = list(_page_range(doc, start_page_id, end_page_id))
+    tasks = [
+        page_ids[i : i + pages_per_task]
+        for i in range(0, len(page_ids), pages_per_task)
+    ]
+    workers = workers or os.cpu_count() or 1
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending, ready = {}, {}
+        next_task = 0
+        for task_id in range(len(tasks)):
+            # Keep the pool busy without rendering the whole PDF up front.
+            while len(pending) < 2 * workers and next_task < len(tasks):
+                future = executor.submit(
+                    _render_pages_to_bytes,
+                    pdf_file,
+                    tasks[next_task],
+                    dpi,
+                    image_format,
+                    jpg_quality,
+                    fit_model,
+                )
+                pending[future] = next_task
+                next_task += 1
+            while task_id not in ready:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    ready[pending.pop(future)] = future.result()
+            yield from ready.pop(task_id)
+
+
+def decode_image_bytes(data: bytes) -> Image.Image:
+    """Decode encoded image bytes (e.g. from `render_pdf_pages_parallel`)."""
+    return Image.open(BytesIO(data))
+
+
+def sniff_image_format(data: bytes) -> str | None:
+    """Return `"png"`, `"jpeg"` or `"webp"` from the magic bytes, else None."""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    for signature, image_format in _IMAGE_SIGNATURES.items():
+        if data.startswith(signature):
+            return image_format
+    return None
+
+
+def image_bytes_to_base64(data: bytes) -> str:
+    """Wrap already encoded PNG/JPEG/WebP bytes in a data URL without re-encoding."""
+    image_format = sniff_image_format(data) or "png"
+    base64_str = base64.b64encode(data).decode("utf-8")
+    return f"data:image/{image_format};base64,{base64_str}"
+
+
+def image_file_to_base64(
+    image_path: str,
+    min_pixels: int = MIN_PIXELS,
+    max_pixels: int = MAX_PIXELS,
+    **encode_kwargs,
+) -> str:
+    """Encode an image file as a data URL, reusing its bytes when possible.
+
+    PNG, JPEG and WebP files whose pixel count already lies within
+    `[min_pixels, max_pixels]` are base64'd as they are, with no decode or
+    re-encode. Other files are resized with `smart_resize` if needed and
+    encoded with `pil_image_to_base64(**encode_kwargs)`.
+    """
+    with open(image_path, "rb") as f:
+        data = f.read()
+    with Image.open(BytesIO(data)) as image:
+        # Opening only parses the header; pixels are decoded on first access.
+        pixels = image.width * image.height
+        if sniff_image_format(data) and min_pixels <= pixels <= max_pixels:
+            return image_bytes_to_base64(data)
+        image.load()
+        if not min_pixels <= pixels <= max_pixels:
+            height, width = smart_resize(
+                image.height,
+                image.width,
+                min_pixels=min_pixels,
+                max_pixels=max_pixels,
+            )
+            image = image.resize((width, height))
+        return pil_image_to_base64(image, **encode_kwargs)
+
+
 def round_by_factor(number: float, factor: int) -> int:
     """Returns the closest integer to 'number' that is divisible by 'factor'."""
     return round(number / factor) * factor
@@ -148,18 +803,47 @@ def smart_resize(
     return h_bar, w_bar
 
 
-def pil_image_to_base64(image: Image.Image, format="PNG"):
+def encode_image(
+    image: Image.Image, format="PNG", quality=DEFAULT_QUALITY, compress_level=None
+) -> bytes:
+    """Encode a PIL image to PNG, JPEG or WebP bytes.
+
+    Args:
+        image: Input `PIL.Image` to encode.
+        format: `"PNG"`, `"JPEG"` or `"WEBP"`. Defaults to `"PNG"`.
+        quality: JPEG/WebP quality (1-100). Ignored for PNG.
+        compress_level: PNG zlib level (0-9). Lower is faster and larger;
+            `None` uses Pillow's default (6). Ignored for JPEG/WebP.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    format = format.upper().replace("JPG", "JPEG")
+    buffered = BytesIO()
+    if format == "PNG":
+        options = {} if compress_level is None else {"compress_level": compress_level}
+    else:
+        options = {"quality": quality}
+        if format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+    image.save(buffered, format=format, **options)
+    return buffered.getvalue()
+
+
+def pil_image_to_base64(
+    image: Image.Image, format="PNG", quality=DEFAULT_QUALITY, compress_level=None
+):
     """Encode a PIL image as a data URL with Base64 content.
 
     Args:
         image: Input `PIL.Image` to encode.
-        format: Image format for encoding (e.g., "PNG", "JPEG"). Defaults to
-            "PNG".
+        format: Image format for encoding ("PNG", "JPEG" or "WEBP"). Defaults
+            to "PNG".
+        quality: JPEG/WebP quality (1-100). Defaults to 90.
+        compress_level: PNG compression level (0-9). `None` uses Pillow's
+            default; 1 is several times faster at a modestly larger size.
 
     Returns:
         str: A `data:image/<format>;base64,<...>` string.
     """
-    buffered = BytesIO()
-    image.save(buffered, format=format)
-    base64_str = base64.b64encode(buffered.getvalue()).decode("utf-8")
-    return f"data:image/{format.lower()};base64,{base64_str}"
+    return image_bytes_to_base64(encode_image(image, format, quality, compress_level))
@@ -0,0 +1,84 @@
+"""Persistent, content-addressed embedding cache.
+
+Embeddings are stored in a SQLite file keyed by SHA-256 of
+`(model_id, normalized text)`, so re-embedding an unchanged corpus only
+costs local lookups. Text normalization (Unicode NFC, collapsed whitespace)
+makes trivially reformatted documents hit the same entry.
+
+- `get_many()` looks up a whole batch in a few `IN (...)` queries and returns
+  `None` for misses.
+- `put_many()` stores new vectors as float32 blobs and evicts the least
+  recently used entries once the cache grows beyond `max_bytes`.
+- `stats()` reports hit rate and size.
+
+Storage, LRU eviction and counters are provided by `utils.sqlite_lru`.
+
+Example:
+    from utils.embedding_cache import EmbeddingCache
+
+    cache = EmbeddingCache("embeddings.sqlite", max_bytes=2 * 1024**3)
+    vectors = cache.get_many("bge-m3", ["some text"])  # [None] on first run
+"""
+
+import hashlib
+import re
+import unicodedata
+from collections.abc import Sequence
+
+import numpy as np
+
+from utils.sqlite_lru import CacheStats, SqliteLRUStore
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Normalize `text` for cache keys (NFC, collapsed whitespace)."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+def cache_key(model_id: str, text: str) -> str:
+    """Return the content address of `text` embedded with `model_id`."""
+    payload = f"{model_id}\0{normalize_text(text)}".encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+class EmbeddingCache:
+    """SQLite-backed embedding cache with size-bounded LRU eviction.
+
+    Args:
+        path: SQLite database file. Created if missing.
+        max_bytes: Maximum total size of stored vectors. `None` disables
+            eviction.
+    """
+
+    def __init__(self, path: str, max_bytes: int | None = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._store = SqliteLRUStore(path, "embedding_cache", max_bytes)
+
+    def get_many(self, model_id: str, texts: Sequence[str]) -> list[np.ndarray | None]:
+        """Return the cached float32 vector for each text, `None` on a miss."""
+        keys = [cache_key(model_id, text) for text in texts]
+        found = self._store.get_many(keys)
+        return [
+            np.frombuffer(found[key], dtype="<f4") if key in found else None
+            for key in keys
+        ]
+
+    def put_many(self, model_id: str, texts: Sequence[str], vectors) -> None:
+        """Store one vector per text and evict old entries if over budget."""
+        # Repeated texts map to one key and are stored once.
+        self._store.put_many(
+            {
+                cache_key(model_id, text): np.asarray(vector, dtype="<f4").tobytes()
+                for text, vector in zip(texts, vectors)
+            }
+        )
+
+    def stats(self) -> CacheStats:
+        """Return hit/miss counters for this instance and the cache size."""
+        return self._store.stats()
+
+    def close(self) -> None:
+        self._store.close()
@@ -1,7 +1,126 @@
-from openai import OpenAI
+"""Cached, lazy model-ID resolution.
 
+The example scripts need the served model's ID for every request, and vLLM
+only exposes it via `/v1/models`. `get_model_id()` memoizes the answer per
+(api_url, api_key) for `ttl` seconds, so repeated calls (e.g. once per OCR
+page) cost no extra round trip. Concurrent callers for the same endpoint
+share one lookup.
 
-def get_model_id(api_key: str, api_url: str) -> str:
-    client = OpenAI(api_key=api_key, base_url=api_url)
-    models = client.models.list()
-    return models.data[0].id
+Set `MODEL_ID_CACHE_FILE` (or pass `cache_file=`) to additionally persist the
+resolved IDs as JSON, so short-lived processes skip the lookup as well. API
+keys are only stored as a SHA-256 digest.
+
+Nothing is resolved at import time; call `get_model_id()` where the ID is
+needed.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from utils.clients import get_openai_client
+
+DEFAULT_TTL = 300.0
+
+_cache: dict[tuple[str, str], tuple[str, float]] = {}
+_locks: dict[tuple[str, str], threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _key_lock(key: tuple[str, str]) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+def _disk_key(api_key: str, api_url: str) -> str:
+    return f"{api_url}|{hashlib.sha256(api_key.encode('utf-8')).hexdigest()}"
+
+
+def _read_disk_cache(
+    cache_file: str, disk_key: str, ttl: float
+) -> tuple[str, float] | None:
+    """Return `(model_id, age_seconds)` of a fresh entry, or None."""
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            entry = json.load(f).get(disk_key)
+    except (OSError, ValueError):
+        return None
+    if not entry:
+        return None
+    age = max(0.0, time.time() - entry["resolved_at"])
+    if age > ttl:
+        return None
+    return entry["id"], age
+
+
+def _write_disk_cache(cache_file: str, disk_key: str, model_id: str) -> None:
+    try:
+        with open(cache_file, encoding="utf-8") as f:
+            entries = json.load(f)
+    except (OSError, ValueError):
+        entries = {}
+    entries[disk_key] = {"id": model_id, "resolved_at": time.time()}
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    # The disk cache is optional: an unwritable path must not fail a lookup
+    # that already succeeded.
+    try:
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(entries, f)
+        os.replace(tmp_file, cache_file)
+    except OSError:
+        pass
+
+
+def get_model_id(
+    api_key: str,
+    api_url: str,
+    ttl: float = DEFAULT_TTL,
+    cache_file: str | None = None,
+) -> str:
+    """Return the ID of the first model served at `api_url`.
+
+    Args:
+        api_key: API key for the OpenAI-compatible endpoint.
+        api_url: Base URL of the endpoint, e.g. `http://localhost:8000/v1`.
+        ttl: Seconds a resolved ID stays valid. Defaults to 300.
+        cache_file: Optional JSON file to persist IDs across processes.
+            Defaults to the `MODEL_ID_CACHE_FILE` environment variable.
+
+    Returns:
+        str: The model ID.
+    """
+    key = (api_url, api_key)
+    cached = _cache.get(key)
+    if cached is not None and time.monotonic() - cached[1] <= ttl:
+        return cached[0]
+
+    cache_file = cache_file or os.environ.get("MODEL_ID_CACHE_FILE")
+    with _key_lock(key):
+        # Another thread may have resolved it while we waited for the lock.
+        cached = _cache.get(key)
+        if cached is not None and time.monotonic() - cached[1] <= ttl:
+            return cached[0]
+
+        entry = None
+        if cache_file:
+            entry = _read_disk_cache(cache_file, _disk_key(api_key, api_url), ttl)
+        if entry is not None:
+            # Keep the entry's age, so it expires `ttl` after it was resolved.
+            model_id, age = entry
+            _cache[key] = (model_id, time.monotonic() - age)
+            return model_id
+
+        client = get_openai_client(base_url=api_url, api_key=api_key)
+        models = client.models.list()
+        model_id = models.data[0].id
+        if cache_file:
+            _write_disk_cache(cache_file, _disk_key(api_key, api_url), model_id)
+        _cache[key] = (model_id, time.monotonic())
+    return model_id
+
+
+def clear_model_id_cache() -> None:
+    """Forget all in-memory model IDs, e.g. after a server redeploy."""
+    _cache.clear()
@@ -0,0 +1,110 @@
+"""Incremental parser for streamed layout JSON.
+
+The layout prompts (`prompt_layout_all_en`, `prompt_layout_only_en`) make
+the model emit one JSON array of layout elements, e.g.
+`[{"bbox": [...], "category": "Text", "text": "..."}, ...]`, possibly wrapped
+in a Markdown code fence or in a top-level object. `LayoutStreamParser`
+consumes the text as it is generated and returns each element as soon as
+its closing brace arrives, so downstream processing can start long before
+the page is finished.
+
+The parser only tracks brackets, strings and escapes; each complete element
+is then decoded with `json.loads`. Text before the current element is
+dropped, so memory stays bounded by the largest single element.
+
+Example:
+    from utils.layout_stream import LayoutStreamParser
+
+    parser = LayoutStreamParser()
+    for chunk in stream:
+        for element in parser.feed(chunk):
+            index(element)
+    parser.close()
+"""
+
+import json
+
+
+class LayoutStreamParser:
+    """Yield layout elements from a JSON array while it is being streamed.
+
+    Elements are the JSON objects directly inside the first array of the
+    output. Objects that fail to decode are skipped.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._element_start: int | None = None
+        self._element_depth = 0
+        self._array_depth: int | None = None
+        self.elements = 0
+
+    def feed(self, chunk: str) -> list[dict]:
+        """Consume the next piece of output and return the elements it closed."""
+        self._buffer += chunk
+        completed = []
+        buffer = self._buffer
+        for pos in range(self._pos, len(buffer)):
+            char = buffer[pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._stack.append(char)
+                if char == "[" and self._array_depth is None:
+                    self._array_depth = len(self._stack)
+                elif (
+                    char == "{"
+                    and self._element_start is None
+                    and self._array_depth is not None
+                    and len(self._stack) == self._array_depth + 1
+                ):
+                    self._element_start = pos
+                    self._element_depth = len(self._stack)
+            elif char in "]}" and self._stack:
+                if char == "}" and len(self._stack) == self._element_depth:
+                    element = self._decode(buffer[self._element_start : pos + 1])
+                    if element is not None:
+                        completed.append(element)
+                    self._element_start = None
+                    self._element_depth = 0
+                self._stack.pop()
+
+        # Keep only the unfinished element.
+        keep_from = len(buffer) if self._element_start is None else self._element_start
+        self._buffer = buffer[keep_from:]
+        self._pos = len(buffer) - keep_from
+        if self._element_start is not None:
+            self._element_start -= keep_from
+        self.elements += len(completed)
+        return completed
+
+    def _decode(self, text: str) -> dict | None:
+        try:
+            element = json.loads(text)
+        except json.JSONDecodeError:
+            return None
+        return element if isinstance(element, dict) else None
+
+    def close(self) -> None:
+        """Check that the output ended outside of an element.
+
+        Raises:
+            ValueError: If the stream stopped inside an element, e.g. because
+                generation hit `max_completion_tokens`.
+        """
+        if self._element_start is not None:
+            raise ValueError(
+                f"layout output ended inside an element after {self.elements} elements"
+            )
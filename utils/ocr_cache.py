@@ -0,0 +1,116 @@
+"""Persistent, content-addressed OCR result cache.
+
+OCR outputs are stored in a SQLite file keyed by SHA-256 of
+`(page pixel hash, prompt mode, model id, request parameters)`. The pixel
+hash is taken over the decoded pixels, so the same page hits the cache
+whether it arrives as a `PIL.Image` or as PNG/JPEG bytes, and re-uploaded
+documents are only sent to the VLM once.
+
+- `image_digest()` hashes the pixels of an image.
+- `ocr_cache_key()` combines it with the prompt and request parameters.
+  Prompts from `utils.ocr_prompts.dict_promptmode_to_prompt` are keyed by
+  their mode name.
+- `OcrCache.get()` / `OcrCache.put()` look up and store results, evicting
+  the least recently used entries once the cache grows beyond `max_bytes`.
+- `stats()` reports hit rate and size.
+
+Storage, LRU eviction and counters are provided by `utils.sqlite_lru`.
+
+Set `OCR_CACHE_PATH` (and optionally `OCR_CACHE_MAX_BYTES`) to enable the
+cache in `dots_ocr.py` and `glm-ocr.py`, see `ocr_cache_from_env()`.
+
+Example:
+    from utils.ocr_cache import OcrCache, image_digest, ocr_cache_key
+
+    cache = OcrCache("ocr.sqlite", max_bytes=512 * 1024**2)
+    key = ocr_cache_key(image_digest(page), prompt, model_id, temperature=0.1)
+    text = cache.get(key)  # None on first run
+"""
+
+import hashlib
+import json
+import os
+from io import BytesIO
+
+from PIL import Image
+
+from utils.ocr_prompts import dict_promptmode_to_prompt
+from utils.sqlite_lru import CacheStats, SqliteLRUStore
+
+_PROMPT_MODES = {prompt: mode for mode, prompt in dict_promptmode_to_prompt.items()}
+
+
+def image_digest(image: Image.Image | bytes) -> str:
+    """Return the SHA-256 of an image's decoded pixels, mode and size."""
+    if isinstance(image, bytes):
+        with Image.open(BytesIO(image)) as decoded:
+            return image_digest(decoded.convert("RGB"))
+    digest = hashlib.sha256(f"{image.mode}:{image.width}x{image.height}:".encode())
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def prompt_mode(prompt: str) -> str:
+    """Return the `dict_promptmode_to_prompt` mode name of `prompt`.
+
+    Unknown prompts (e.g. `prompt_grounding_ocr` with a bbox appended) are
+    returned unchanged, so they are keyed by their full text.
+    """
+    return _PROMPT_MODES.get(prompt, prompt)
+
+
+def ocr_cache_key(digest: str, prompt: str, model_id: str, **params) -> str:
+    """Return the content address of an OCR request.
+
+    Args:
+        digest: `image_digest()` of the page.
+        prompt: Prompt text sent with the page.
+        model_id: Served model ID.
+        **params: Sampling and encoding parameters that change the output,
+            e.g. `temperature`, `top_p`, `max_completion_tokens`.
+    """
+    payload = json.dumps(
+        [digest, prompt_mode(prompt), model_id, params], sort_keys=True, default=str
+    ).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+class OcrCache:
+    """SQLite-backed OCR result cache with size-bounded LRU eviction.
+
+    Args:
+        path: SQLite database file. Created if missing.
+        max_bytes: Maximum total size of stored results. `None` disables
+            eviction.
+    """
+
+    def __init__(self, path: str, max_bytes: int | None = None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._store = SqliteLRUStore(path, "ocr_cache", max_bytes)
+
+    def get(self, key: str) -> str | None:
+        """Return the cached OCR text for `key`, `None` on a miss."""
+        value = self._store.get_many([key]).get(key)
+        return None if value is None else value.decode("utf-8")
+
+    def put(self, key: str, text: str) -> None:
+        """Store `text` under `key` and evict old entries if over budget."""
+        self._store.put_many({key: text.encode("utf-8")})
+
+    def stats(self) -> CacheStats:
+        """Return hit/miss counters for this instance and the cache size."""
+        return self._store.stats()
+
+    def close(self) -> None:
+        self._store.close()
+
+
+def ocr_cache_from_env() -> OcrCache | None:
+    """Return an `OcrCache` at `OCR_CACHE_PATH`, or None if it is unset."""
+    path = os.environ.get("OCR_CACHE_PATH")
+    if not path:
+        return None
+    return OcrCache(
+        path, max_bytes=int(os.environ.get("OCR_CACHE_MAX_BYTES", "0")) or None
+    )
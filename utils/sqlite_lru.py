@@ -0,0 +1,159 @@
+"""Size-bounded LRU key/value store in a SQLite file.
+
+The storage layer shared by `utils.embedding_cache` and `utils.ocr_cache`.
+Values are opaque blobs under string keys; each cache brings its own key
+derivation and value encoding.
+
+- `get_many()` looks up a batch of keys in a few `IN (...)` queries and
+  refreshes their access time.
+- `put_many()` inserts or replaces values and evicts the least recently used
+  entries once the stored values grow beyond `max_bytes`.
+- `stats()` reports hit/miss counters and size.
+
+The store is safe to share between threads.
+"""
+
+import sqlite3
+import threading
+import time
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
+
+# SQLite limits the number of bound parameters per statement.
+_LOOKUP_CHUNK = 900
+# After eviction the store is trimmed to this fraction of `max_bytes`, so
+# eviction does not run again on every following insert.
+_EVICT_TO = 0.9
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _chunks(keys: Sequence[str]):
+    for start in range(0, len(keys), _LOOKUP_CHUNK):
+        chunk = keys[start : start + _LOOKUP_CHUNK]
+        yield chunk, ",".join("?" * len(chunk))
+
+
+class SqliteLRUStore:
+    """SQLite-backed blob store with size-bounded LRU eviction.
+
+    Args:
+        path: SQLite database file. Created if missing.
+        table: Table holding this store's entries.
+        max_bytes: Maximum total size of stored values. `None` disables
+            eviction.
+    """
+
+    def __init__(self, path: str, table: str, max_bytes: int | None = None):
+        self.path = path
+        self.table = table
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {table}_last_access ON {table} (last_access)"
+        )
+        self._conn.commit()
+        self._bytes = self._conn.execute(
+            f"SELECT COALESCE(SUM(LENGTH(value)), 0) FROM {table}"
+        ).fetchone()[0]
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, bytes]:
+        """Return the stored value of every key that is present."""
+        found: dict[str, bytes] = {}
+        with self._lock:
+            for chunk, placeholders in _chunks(keys):
+                rows = self._conn.execute(
+                    f"SELECT key, value FROM {self.table}"
+                    f" WHERE key IN ({placeholders})",
+                    chunk,
+                )
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+            hits = sum(key in found for key in keys)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put_many(self, values: Mapping[str, bytes]) -> None:
+        """Store `values` and evict old entries if over budget."""
+        now = time.time()
+        keys = list(values)
+        with self._lock:
+            replaced = 0
+            for chunk, placeholders in _chunks(keys):
+                replaced += self._conn.execute(
+                    f"SELECT COALESCE(SUM(LENGTH(value)), 0) FROM {self.table}"
+                    f" WHERE key IN ({placeholders})",
+                    chunk,
+                ).fetchone()[0]
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, last_access)"
+                " VALUES (?, ?, ?)",
+                [(key, value, now) for key, value in values.items()],
+            )
+            self._bytes += sum(len(value) for value in values.values()) - replaced
+            if self.max_bytes is not None and self._bytes > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        target = int(self.max_bytes * _EVICT_TO)
+        while self._bytes > target:
+            rows = self._conn.execute(
+                f"SELECT key, LENGTH(value) FROM {self.table}"
+                " ORDER BY last_access LIMIT ?",
+                (_LOOKUP_CHUNK,),
+            ).fetchall()
+            if not rows:
+                self._bytes = 0
+                break
+            evicted, freed = [], 0
+            for key, size in rows:
+                evicted.append((key,))
+                freed += size
+                if self._bytes - freed <= target:
+                    break
+            self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", evicted)
+            self._bytes -= freed
+
+    def stats(self) -> CacheStats:
+        """Return hit/miss counters for this instance and the store size."""
+        with self._lock:
+            entries = self._conn.execute(
+                f"SELECT COUNT(*) FROM {self.table}"
+            ).fetchone()[0]
+            return CacheStats(
+                hits=self.hits, misses=self.misses, entries=entries, bytes=self._bytes
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,186 @@
+"""Local in-process vector index for `embeddings_api` output.
+
+`VectorIndex` stores L2-normalized vectors and answers cosine top-k queries
+with batched NumPy matrix multiplies, scanning the corpus in blocks so the
+score matrix stays small. Two storage modes are supported:
+
+- exact (default): float32 vectors, exact cosine scores.
+- quantized (`quantize=True`): one int8 code per dimension plus one float32
+  scale per vector. 4x smaller on disk and in memory; scores are
+  approximate (typically within ~1e-2 of the exact cosine).
+
+Indexes are saved as plain `.npy` files and loaded memory-mapped, so opening
+a large index is nearly instant and pages are read on demand.
+
+Example:
+    from embeddings_api import encode_batch, encode_queries
+    from utils.vector_index import VectorIndex
+
+    index = VectorIndex(encode_batch(corpus))
+    index.save("corpus_index")
+
+    index = VectorIndex.load("corpus_index")
+    scores, ids = index.search(encode_queries(), k=5)
+"""
+
+import json
+import os
+
+import numpy as np
+
+# Rows scored per matrix multiply. Keeps the (queries x block) score matrix
+# and, in quantized mode, the dequantized block within a few hundred MB.
+DEFAULT_BLOCK_SIZE = 65536
+DEFAULT_QUERY_BATCH_SIZE = 256
+
+_META_FILE = "index.json"
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """Return `vectors` as float32 rows scaled to unit L2 norm."""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def quantize_int8(vectors: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization. Returns `(codes, scales)`."""
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def _merge_top_k(
+    best_scores: np.ndarray | None,
+    best_ids: np.ndarray | None,
+    scores: np.ndarray,
+    offset: int,
+    k: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    ids = np.broadcast_to(np.arange(offset, offset + scores.shape[1]), scores.shape)
+    if best_scores is not None:
+        scores = np.concatenate([best_scores, scores], axis=1)
+        ids = np.concatenate([best_ids, ids], axis=1)
+    if scores.shape[1] > k:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, top, axis=1)
+        ids = np.take_along_axis(ids, top, axis=1)
+    return scores, ids
+
+
+class VectorIndex:
+    """Cosine-similarity index over a fixed set of vectors.
+
+    Args:
+        vectors: Matrix of shape `(n, dim)`, e.g. from `encode_batch()`.
+        quantize: Store int8 codes instead of float32 vectors.
+    """
+
+    def __init__(self, vectors: np.ndarray, quantize: bool = False):
+        vectors = normalize_rows(vectors)
+        self.quantized = quantize
+        if quantize:
+            self.codes, self.scales = quantize_int8(vectors)
+            self.vectors = None
+        else:
+            self.vectors = vectors
+            self.codes = self.scales = None
+
+    @classmethod
+    def _from_arrays(cls, vectors=None, codes=None, scales=None) -> "VectorIndex":
+        index = cls.__new__(cls)
+        index.quantized = codes is not None
+        index.vectors, index.codes, index.scales = vectors, codes, scales
+        return index
+
+    def __len__(self) -> int:
+        return len(self.codes if self.quantized else self.vectors)
+
+    @property
+    def dim(self) -> int:
+        return (self.codes if self.quantized else self.vectors).shape[1]
+
+    def _block_scores(self, queries: np.ndarray, start: int, stop: int) -> np.ndarray:
+        if self.quantized:
+            block = self.codes[start:stop].astype(np.float32)
+            return (queries @ block.T) * self.scales[start:stop]
+        return queries @ self.vectors[start:stop].T
+
+    def search(
+        self,
+        queries: np.ndarray,
+        k: int = 10,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        query_batch_size: int = DEFAULT_QUERY_BATCH_SIZE,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return the `k` most similar vectors for each query.
+
+        Args:
+            queries: One query vector or a matrix of shape `(nq, dim)`, e.g.
+                from `encode_queries()`.
+            k: Number of results per query.
+            block_size: Corpus rows scored per matrix multiply.
+            query_batch_size: Queries scored together.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: `(scores, ids)`, both of shape
+            `(nq, k)` and sorted by descending score. `ids` are row indices
+            into the indexed vectors. Empty `(nq, 0)` arrays if the index is
+            empty or `k <= 0`.
+        """
+        queries = normalize_rows(queries)
+        k = min(k, len(self))
+        if k <= 0:
+            return (
+                np.empty((len(queries), 0), dtype=np.float32),
+                np.empty((len(queries), 0), dtype=np.int64),
+            )
+        all_scores, all_ids = [], []
+        for q_start in range(0, len(queries), query_batch_size):
+            batch = queries[q_start : q_start + query_batch_size]
+            best_scores = best_ids = None
+            for start in range(0, len(self), block_size):
+                stop = min(start + block_size, len(self))
+                best_scores, best_ids = _merge_top_k(
+                    best_scores,
+                    best_ids,
+                    self._block_scores(batch, start, stop),
+                    start,
+                    k,
+                )
+            order = np.argsort(-best_scores, axis=1)
+            all_scores.append(np.take_along_axis(best_scores, order, axis=1))
+            all_ids.append(np.take_along_axis(best_ids, order, axis=1))
+        return np.concatenate(all_scores), np.concatenate(all_ids)
+
+    def save(self, directory: str) -> None:
+        """Write the index to `directory` as `.npy` files."""
+        os.makedirs(directory, exist_ok=True)
+        if self.quantized:
+            np.save(os.path.join(directory, "codes.npy"), self.codes)
+            np.save(os.path.join(directory, "scales.npy"), self.scales)
+        else:
+            np.save(os.path.join(directory, "vectors.npy"), self.vectors)
+        with open(os.path.join(directory, _META_FILE), "w", encoding="utf-8") as f:
+            json.dump(
+                {"quantized": self.quantized, "size": len(self), "dim": self.dim}, f
+            )
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "VectorIndex":
+        """Load an index saved with `save()`, memory-mapped by default."""
+        mmap_mode = "r" if mmap else None
+        with open(os.path.join(directory, _META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["quantized"]:
+            return cls._from_arrays(
+                codes=np.load(
+                    os.path.join(directory, "codes.npy"), mmap_mode=mmap_mode
+                ),
+                scales=np.load(os.path.join(directory, "scales.npy")),
+            )
+        return cls._from_arrays(
+            vectors=np.load(os.path.join(directory, "vectors.npy"), mmap_mode=mmap_mode)
+        )
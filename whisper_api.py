@@ -1,11 +1,35 @@
+import asyncio
+import glob
+import heapq
 import json
 import os
+import random
+import re
+import tempfile
 import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 
 import bentoml
 import openai
 import truststore
 
+from utils.audio_utils import (
+    SAMPLE_RATE,
+    audio_duration,
+    decode_audio,
+    preprocess_audio,
+    split_on_silence,
+    write_wav,
+)
+from utils.clients import (
+    aclose_clients,
+    get_async_openai_client,
+    get_http_client,
+    get_openai_client,
+)
+
 truststore.inject_into_ssl()
 
 AUDIO_PATH = "example_data/example_audio.mp3"
@@ -14,20 +38,240 @@ API_URL = "http://localhost:9001"
 
 api_key = "{}".format(os.environ.get("API_KEY", "0"))
 
+# Long-audio mode: target chunk length and number of chunks in flight. Set the
+# concurrency to the number of Whisper workers behind API_URL.
+LONG_AUDIO_CHUNK_SECONDS = 60.0
+LONG_AUDIO_MAX_WORKERS = 4
+
+# Task polling: start fast, back off exponentially while a task is running.
+TASK_POLL_INITIAL_SECONDS = 0.5
+TASK_POLL_MAX_SECONDS = 10.0
+TASK_POLL_BACKOFF = 1.5
+TASK_POLL_JITTER = 0.2
+
+# Bulk transcription via the async OpenAI client.
+BULK_AUDIO_EXTENSIONS = (".mp3", ".wav", ".m4a", ".flac", ".ogg", ".opus", ".webm")
+BULK_MAX_CONCURRENCY = 8
+BULK_MAX_ATTEMPTS = 3
+
+
+def bento_transcribe(audio_path=AUDIO_PATH, preprocess=False):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if preprocess:
+            audio_path = _preprocess_for_upload(audio_path, tmp_dir)
+        with bentoml.SyncHTTPClient(API_URL) as client:
+            if client.is_ready():
+                transcription = client.transcribe(file=audio_path)
+                transcription = json.loads(transcription)
+                print(transcription["text"])
+
+
+def _preprocess_for_upload(audio_path, tmp_dir):
+    """Trim silences and re-encode `audio_path` into `tmp_dir` before upload.
+
+    Segment timestamps of the transcription then refer to the trimmed audio.
+    """
+    output_path = os.path.join(
+        tmp_dir, os.path.splitext(os.path.basename(audio_path))[0] + ".ogg"
+    )
+    report = preprocess_audio(audio_path, output_path)
+    print(
+        f"Preprocessed {audio_path}: {report.bytes_saved / 1024:.0f} KiB saved "
+        f"({report.original_bytes / 1024:.0f} -> {report.output_bytes / 1024:.0f} KiB), "
+        f"{report.seconds_removed:.1f} s of silence removed"
+    )
+    return output_path
+
+
+def bento_transcribe_long(
+    audio_path=AUDIO_PATH,
+    chunk_seconds=LONG_AUDIO_CHUNK_SECONDS,
+    max_workers=LONG_AUDIO_MAX_WORKERS,
+):
+    """Transcribe a long recording as concurrently transcribed chunks.
+
+    The audio is decoded to 16 kHz mono and cut in silences into chunks of
+    about `chunk_seconds`. Up to `max_workers` chunks are transcribed at once,
+    then the text and segment timestamps are stitched back in order.
+
+    Returns:
+        dict: `{"text": str, "segments": list[dict], "chunks": int}`, with
+        segment `start`/`end` in seconds from the start of the recording.
+    """
+    samples = decode_audio(audio_path)
+    chunks = split_on_silence(samples, chunk_seconds=chunk_seconds)
+
+    with (
+        tempfile.TemporaryDirectory() as tmp_dir,
+        bentoml.SyncHTTPClient(API_URL) as client,
+    ):
+        paths = []
+        for i, (start, end) in enumerate(chunks):
+            path = os.path.join(tmp_dir, f"chunk_{i:05d}.wav")
+            write_wav(path, samples[start:end])
+            paths.append(path)
+
+        def transcribe_chunk(path):
+            return json.loads(client.transcribe(file=path))
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(transcribe_chunk, paths))
+
+    texts, segments = [], []
+    for (start, _), result in zip(chunks, results):
+        offset = start / SAMPLE_RATE
+        texts.append(result["text"].strip())
+        for segment in result.get("segments", []):
+            segments.append(
+                {
+                    **segment,
+                    "start": segment["start"] + offset,
+                    "end": segment["end"] + offset,
+                }
+            )
+    text = " ".join(t for t in texts if t)
+    print(text)
+    return {"text": text, "segments": segments, "chunks": len(chunks)}
+
+
+@dataclass
+class TranscriptSegment:
+    text: str
+    start: float | None = None
+    end: float | None = None
+
+
+@dataclass
+class StreamMetrics:
+    """Latency metrics of one streaming transcription, all in seconds."""
+
+    time_to_first_segment: float | None = None
+    segment_gaps: list[float] = field(default_factory=list)
+    segments: int = 0
+    wall_seconds: float = 0.0
+    audio_seconds: float | None = None
+    finished: bool = False
+
+    @property
+    def max_gap(self) -> float | None:
+        return max(self.segment_gaps) if self.segment_gaps else None
+
+    @property
+    def real_time_factor(self) -> float | None:
+        """Wall time per second of audio; below 1.0 is faster than real time."""
+        if not self.audio_seconds:
+            return None
+        return self.wall_seconds / self.audio_seconds
+
+
+def print_stream_metrics(metrics: StreamMetrics) -> None:
+    """Default metrics hook: print a summary once the stream has finished."""
+    if not metrics.finished:
+        return
+    ttfs = metrics.time_to_first_segment
+    rtf = metrics.real_time_factor
+    max_gap = metrics.max_gap
+    print(
+        f"{metrics.segments} segments in {metrics.wall_seconds:.2f} s, "
+        f"time to first segment {'n/a' if ttfs is None else f'{ttfs:.2f} s'}, "
+        f"max gap {'n/a' if max_gap is None else f'{max_gap:.2f} s'}, "
+        f"RTF {'n/a' if rtf is None else f'{rtf:.3f}'}"
+    )
+
+
+# "[0.00 -> 2.50] text", with optional "s" units and "-->" arrows.
+_TIMESTAMPED_LINE = re.compile(
+    r"^\s*\[?\s*(\d+(?:\.\d+)?)s?\s*-{1,2}>\s*(\d+(?:\.\d+)?)s?\s*\]?\s*(.*)$"
+)
+
+
+def parse_stream_chunk(chunk) -> list[TranscriptSegment]:
+    """Parse one `streaming_transcribe` chunk into segments.
+
+    Accepts JSON objects (`{"text", "start", "end"}` or with a `segments`
+    list), `[start -> end] text` lines, or plain text.
+    """
+    if isinstance(chunk, bytes):
+        chunk = chunk.decode("utf-8")
+    if isinstance(chunk, str):
+        try:
+            chunk = json.loads(chunk)
+        except ValueError:
+            segments = []
+            for line in chunk.splitlines():
+                match = _TIMESTAMPED_LINE.match(line)
+                if match:
+                    start, end, text = match.groups()
+                    segments.append(TranscriptSegment(text, float(start), float(end)))
+                elif line.strip():
+                    segments.append(TranscriptSegment(line.strip()))
+            return segments
+    if isinstance(chunk, dict):
+        if "segments" in chunk:
+            return [s for item in chunk["segments"] for s in parse_stream_chunk(item)]
+        return [
+            TranscriptSegment(
+                chunk.get("text", "").strip(), chunk.get("start"), chunk.get("end")
+            )
+        ]
+    return [TranscriptSegment(str(chunk))]
+
+
+def iter_transcribe_stream(
+    audio_path=AUDIO_PATH,
+    metrics_hook: Callable[[StreamMetrics], None] | None = print_stream_metrics,
+) -> Iterator[TranscriptSegment]:
+    """Yield parsed segments from `streaming_transcribe` as they arrive.
+
+    `metrics_hook` is called with the running `StreamMetrics` after every
+    segment and once more with `finished=True` at the end of the stream. The
+    real-time factor uses the file duration (via ffprobe) or, if unknown, the
+    end time of the last segment.
+
+    Timings are taken when each chunk arrives, and the time the consumer
+    spends between segments is excluded, so they measure the server only.
+    """
+    metrics = StreamMetrics(audio_seconds=audio_duration(audio_path))
+    last_end = None
+    paused = 0.0  # time spent suspended in `yield`
+
+    def server_clock() -> float:
+        return time.perf_counter() - paused
 
-def bento_transcribe():
     with bentoml.SyncHTTPClient(API_URL) as client:
-        if client.is_ready():
-            transcription = client.transcribe(file=AUDIO_PATH)
-            transcription = json.loads(transcription)
-            print(transcription["text"])
+        if not client.is_ready():
+            return
+        start = last = server_clock()
+        for chunk in client.streaming_transcribe(file=audio_path):
+            arrived = server_clock()
+            for segment in parse_stream_chunk(chunk):
+                if metrics.time_to_first_segment is None:
+                    metrics.time_to_first_segment = arrived - start
+                else:
+                    metrics.segment_gaps.append(arrived - last)
+                last = arrived
+                metrics.segments += 1
+                metrics.wall_seconds = arrived - start
+                last_end = segment.end if segment.end is not None else last_end
+                if metrics_hook:
+                    metrics_hook(metrics)
+                suspended = time.perf_counter()
+                yield segment
+                paused += time.perf_counter() - suspended
+        metrics.wall_seconds = server_clock() - start
+    if metrics.audio_seconds is None:
+        metrics.audio_seconds = last_end
+    metrics.finished = True
+    if metrics_hook:
+        metrics_hook(metrics)
 
 
 def bento_transcribe_stream():
-    with bentoml.SyncHTTPClient(API_URL) as client:
-        if client.is_ready():
-            for chunk in client.streaming_transcribe(file=AUDIO_PATH):
-                print(chunk)
+    for segment in iter_transcribe_stream():
+        if segment.start is None:
+            print(segment.text)
+        else:
+            print(f"[{segment.start:.2f} -> {segment.end:.2f}] {segment.text}")
 
 
 def bento_transcribe_task():
@@ -37,6 +281,7 @@ def bento_transcribe_task():
             print("Task submitted, ID: ", task.id)
 
             done = False
+            delay = TASK_POLL_INITIAL_SECONDS
             while not done:
                 status = task.get_status()
                 if status.value == "success":
@@ -49,7 +294,129 @@ def bento_transcribe_task():
                     done = True
                 else:
                     print("The task is still running.")
-                    time.sleep(5)
+                    time.sleep(delay)
+                    delay = _next_poll_delay(delay)
+
+
+def _next_poll_delay(delay: float) -> float:
+    delay = min(delay * TASK_POLL_BACKOFF, TASK_POLL_MAX_SECONDS)
+    return delay * random.uniform(1 - TASK_POLL_JITTER, 1 + TASK_POLL_JITTER)
+
+
+class _ResumedTask:
+    """Task handle rebuilt from a task ID, for tasks submitted by an earlier run.
+
+    Uses BentoML's task routes (`/<endpoint>/status` and `/<endpoint>/get`).
+    """
+
+    class _Status:
+        def __init__(self, value: str):
+            self.value = value
+
+    def __init__(self, task_id: str, endpoint: str = "task_transcribe"):
+        self.id = task_id
+        self.url = f"{API_URL}/{endpoint}"
+
+    def get_status(self):
+        response = get_http_client(self.url).get(
+            f"{self.url}/status", params={"task_id": self.id}
+        )
+        response.raise_for_status()
+        return self._Status(response.json()["status"])
+
+    def get(self):
+        response = get_http_client(self.url).get(
+            f"{self.url}/get", params={"task_id": self.id}
+        )
+        response.raise_for_status()
+        return response.text
+
+
+def _load_manifest(manifest_path: str | None) -> dict:
+    if manifest_path and os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_manifest(manifest_path: str | None, manifest: dict) -> None:
+    if not manifest_path:
+        return
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, manifest_path)
+
+
+def bento_transcribe_tasks(
+    audio_paths: Iterable[str], manifest_path: str | None = None
+) -> Iterator[tuple[str, dict | None]]:
+    """Submit many files as background tasks and yield results as they finish.
+
+    All files are submitted up front via `task_transcribe.submit`. Each task
+    is then polled on its own schedule with exponential backoff and jitter,
+    so short jobs are picked up quickly without hammering the server.
+
+    If `manifest_path` is given, task IDs and finished results are recorded
+    there. Calling again with the same manifest skips finished files, yields
+    their stored results, and re-attaches to tasks still running on the
+    server instead of submitting them again.
+
+    A task whose status or result cannot be fetched (e.g. an unknown task
+    ID after a server restart) is recorded as failed; the others are still
+    polled.
+
+    Yields:
+        tuple[str, dict | None]: `(audio_path, transcription)` in completion
+        order; the transcription is `None` if the task failed.
+    """
+    manifest = _load_manifest(manifest_path)
+    with bentoml.SyncHTTPClient(API_URL) as client:
+        tasks = {}
+        for path in audio_paths:
+            entry = manifest.get(path, {})
+            if entry.get("status") in ("success", "failure"):
+                yield path, entry.get("result")
+            elif entry.get("task_id"):
+                tasks[path] = _ResumedTask(entry["task_id"])
+            else:
+                task = client.task_transcribe.submit(file=path)
+                manifest[path] = {"task_id": task.id, "status": "submitted"}
+                tasks[path] = task
+                # Record every submission at once, so an interrupted run
+                # re-attaches to it instead of submitting it again.
+                _save_manifest(manifest_path, manifest)
+
+        # (next poll time, path, current delay), ordered by next poll time.
+        now = time.monotonic()
+        schedule = [(now, path, TASK_POLL_INITIAL_SECONDS) for path in tasks]
+        heapq.heapify(schedule)
+        while schedule:
+            poll_at, path, delay = heapq.heappop(schedule)
+            time.sleep(max(0.0, poll_at - time.monotonic()))
+            task = tasks[path]
+            entry = {"task_id": task.id}
+            try:
+                status = task.get_status().value
+                if status == "success":
+                    result = json.loads(task.get())
+                elif status in ("failure", "cancelled"):
+                    result = None
+                else:
+                    next_delay = _next_poll_delay(delay)
+                    heapq.heappush(
+                        schedule, (time.monotonic() + next_delay, path, next_delay)
+                    )
+                    continue
+            except Exception as e:
+                # E.g. a resumed task the server no longer knows. Record it as
+                # failed, so later runs do not poll it again, and keep going.
+                print(f"{path}: task {task.id} failed: {e}")
+                status, result = "failure", None
+                entry["error"] = str(e)
+            manifest[path] = {**entry, "status": status, "result": result}
+            _save_manifest(manifest_path, manifest)
+            yield path, result
 
 
 def bento_translate():
@@ -61,14 +428,145 @@ def bento_translate():
 
 
 def openai_transcribe():
-    audio_file = open(AUDIO_PATH, "rb")
-    openai_client = openai.OpenAI(api_key=api_key, base_url=API_URL + "/v1")
-    transcription = openai_client.audio.transcriptions.create(
-        file=audio_file, model="large-v3"
-    )
+    openai_client = get_openai_client(base_url=API_URL + "/v1", api_key=api_key)
+    with open(AUDIO_PATH, "rb") as audio_file:
+        transcription = openai_client.audio.transcriptions.create(
+            file=audio_file, model="large-v3"
+        )
     print(transcription.text)
 
 
+# Transient failures worth retrying; 4xx errors such as BadRequestError are
+# raised at once.
+_RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+def _collect_audio_files(source: str) -> list[str]:
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(p for p in paths if p.lower().endswith(BULK_AUDIO_EXTENSIONS))
+
+
+def _read_bytes(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _write_json(path: str, data) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+async def _transcribe_to_file(
+    client, path, output_path, model, max_attempts, preprocess
+):
+    upload_path = path
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if preprocess:
+            upload_path = await asyncio.to_thread(_preprocess_for_upload, path, tmp_dir)
+        audio = await asyncio.to_thread(_read_bytes, upload_path)
+    for attempt in range(1, max_attempts + 1):
+        try:
+            transcription = await client.audio.transcriptions.create(
+                file=(os.path.basename(upload_path), audio), model=model
+            )
+            break
+        except _RETRYABLE_ERRORS as e:
+            if attempt == max_attempts:
+                raise
+            print(f"{path}: attempt {attempt} failed ({e}), retrying")
+            await asyncio.sleep(2**attempt * random.uniform(0.5, 1.0))
+
+    await asyncio.to_thread(_write_json, output_path, transcription.model_dump())
+    # Only used for the throughput report, so probe after the upload is done.
+    return await asyncio.to_thread(audio_duration, path)
+
+
+async def openai_transcribe_bulk(
+    source: str,
+    output_dir: str,
+    model: str = "large-v3",
+    max_concurrency: int = BULK_MAX_CONCURRENCY,
+    max_attempts: int = BULK_MAX_ATTEMPTS,
+    preprocess: bool = False,
+) -> dict:
+    """Transcribe every audio file in a directory or glob concurrently.
+
+    At most `max_concurrency` uploads are in flight. Failed requests are
+    retried up to `max_attempts` times with exponential backoff. Each result
+    is written to `<output_dir>/<path>.json` as soon as it completes, where
+    `<path>` is the file's path below the directory common to all inputs,
+    extension included (e.g. `sub/a.mp3.json`).
+    With `preprocess=True` each file is trimmed and re-encoded before upload.
+
+    Returns:
+        dict: Throughput report with `files`, `failed`, `wall_seconds`,
+        `files_per_minute`, `audio_seconds` and `audio_seconds_per_second`
+        (the last two need `ffprobe`).
+    """
+    paths = _collect_audio_files(source)
+    os.makedirs(output_dir, exist_ok=True)
+    # Keep the extension and the path below the common directory, so
+    # `a.mp3` next to `a.wav`, or equal names in different directories, do
+    # not overwrite each other's result.
+    root = os.path.commonpath([os.path.dirname(p) or "." for p in paths or ["."]])
+    output_paths = {
+        path: os.path.join(output_dir, os.path.relpath(path, root) + ".json")
+        for path in paths
+    }
+    # Retries are handled per file below, so turn off the SDK's own retries.
+    client = get_async_openai_client(
+        base_url=API_URL + "/v1", api_key=api_key
+    ).with_options(max_retries=0)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(path):
+        async with semaphore:
+            return await _transcribe_to_file(
+                client, path, output_paths[path], model, max_attempts, preprocess
+            )
+
+    start = time.perf_counter()
+    try:
+        results = await asyncio.gather(
+            *(bounded(path) for path in paths), return_exceptions=True
+        )
+    finally:
+        await aclose_clients()
+    wall_seconds = time.perf_counter() - start
+
+    failed = 0
+    audio_seconds = 0.0
+    for path, result in zip(paths, results):
+        if isinstance(result, BaseException):
+            failed += 1
+            print(f"{path}: failed: {result}")
+        elif result is not None:
+            audio_seconds += result
+    wall_seconds = max(wall_seconds, 1e-9)
+    report = {
+        "files": len(paths) - failed,
+        "failed": failed,
+        "wall_seconds": wall_seconds,
+        "files_per_minute": (len(paths) - failed) / wall_seconds * 60,
+        "audio_seconds": audio_seconds,
+        "audio_seconds_per_second": audio_seconds / wall_seconds,
+    }
+    print(
+        f"{report['files']} files ({report['failed']} failed) in {wall_seconds:.1f} s: "
+        f"{report['files_per_minute']:.1f} files/min, "
+        f"{report['audio_seconds_per_second']:.1f} audio-s per wall-s"
+    )
+    return report
+
+
 if __name__ == "__main__":
     bento_transcribe()
     bento_transcribe_stream()